@@ -0,0 +1,111 @@
+import argparse
+import datetime
+import json
+import platform
+
+import numpy as np
+
+from benchmarks.hot_paths import benchmark_best_action, benchmark_generator, benchmark_learn, benchmark_step, \
+    summarize
+from classes.agent import Agent
+from classes.dense_agent import DenseAgent
+from classes.racetrack_list import RacetrackList
+from classes.tiled_agent import TiledAgent
+from classes.utils import check_positive_int, get_track
+
+
+def run_benchmarks(track_numbers: list[int], generator_seeds: list[int], repeats: int, n_steps: int,
+                   generator_sizes: list[int] = (50,), generator_only: bool = False) -> list[dict]:
+    """
+    Runs all benchmarks on the given racetracks.
+
+    :param track_numbers: numbers of the predefined racetracks
+    :param generator_seeds: seeds of the generated racetracks
+    :param repeats: how many times each measurement is repeated
+    :param n_steps: number of steps (or calls) per measurement
+    :param generator_sizes: sizes of the racetracks for the generator benchmark
+    :param generator_only: if only the generator should be benchmarked
+    :return: one entry with statistics per benchmark and racetrack
+    """
+    tracks = []
+    if not generator_only:
+        tracks = [(f"tn-{number}", get_track(number, None)) for number in track_numbers] + \
+                 [(f"tr-{seed}", get_track(None, seed)) for seed in generator_seeds]
+
+    results = []
+
+    def measure(name: str, track_name: str, unit: str, function) -> None:
+        values = [function() for _ in range(repeats)]
+        result = {"benchmark": name, "track": track_name, "unit": unit} | summarize(values)
+        results.append(result)
+        print(f"* {name:<44} {track_name:<8} {result['mean']:>14.6g} ± {result['std']:<12.4g} {unit}")
+
+    for track_name, track in tracks:
+        for use_table in [False, True]:
+            suffix = "[table]" if use_table else ""
+            measure(f"Game.step{suffix}", track_name, "steps/s",
+                    lambda: benchmark_step(track, n_steps, noisy=False, use_transition_table=use_table))
+            measure(f"Game.noisy_step{suffix}", track_name, "steps/s",
+                    lambda: benchmark_step(track, n_steps, noisy=True, use_transition_table=use_table))
+        for agent_name, agent_factory in [("Agent", lambda: Agent(random_state=0)),
+                                          ("DenseAgent", lambda: DenseAgent(random_state=0, racetrack_shape=track.shape)),
+                                          ("TiledAgent", lambda: TiledAgent(random_state=0, racetrack_shape=track.shape))]:
+            measure(f"{agent_name}.determine_best_action", track_name, "calls/s",
+                    lambda: benchmark_best_action(track, agent_factory, n_steps))
+            measure(f"{agent_name}.learn", track_name, "s/episode",
+                    lambda: benchmark_learn(track, agent_factory, 10))
+
+    for size in generator_sizes:
+        for seed in generator_seeds:
+            measure(f"Generator.generate_racetrack_safely[{size}]", f"tr-{seed}", "s/track",
+                    lambda: benchmark_generator(seed, size=size))
+
+    return results
+
+
+def main() -> None:
+    # define arguments
+    parser = argparse.ArgumentParser(prog="racetrack-benchmark",
+                                     description="Measure the performance of the simulation and learning hot paths")
+    parser.add_argument('-tn', '--track-numbers', help="predefined racetracks to benchmark (default: all)",
+                        type=int, nargs='*', choices=range(0, RacetrackList.get_tracks_count()))
+    parser.add_argument('-tr', '--track-random', help="seeds of generated racetracks to benchmark",
+                        type=check_positive_int, nargs='*', default=[42, 81, 7], metavar='SEED')
+    parser.add_argument('-r', '--repeats', help="how many times each measurement is repeated",
+                        type=check_positive_int, default=5)
+    parser.add_argument('-n', '--steps', help="number of steps (or calls) per measurement",
+                        type=check_positive_int, default=20000)
+    parser.add_argument('-gs', '--generator-sizes', help="sizes of the generated racetracks to measure the generator with",
+                        type=check_positive_int, nargs='+', default=[50], metavar='SIZE')
+    parser.add_argument('-go', '--generator-only', help="only measure the generator (e.g. to compare its cost by size)",
+                        action='store_true')
+    parser.add_argument('-o', '--output', help="save the results as json to this file", metavar='PATH')
+
+    # parse arguments
+    args = parser.parse_args()
+    track_numbers = args.track_numbers
+    if track_numbers is None:
+        track_numbers = list(range(RacetrackList.get_tracks_count()))
+
+    print("Running benchmarks...")
+    results = run_benchmarks(track_numbers, args.track_random, args.repeats, args.steps, args.generator_sizes,
+                             args.generator_only)
+
+    if args.output is not None:
+        report = {
+            "created": datetime.datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.platform(),
+            "repeats": args.repeats,
+            "steps": args.steps,
+            "generator_sizes": args.generator_sizes,
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"* saved results to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
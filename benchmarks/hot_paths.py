@@ -0,0 +1,114 @@
+import time
+from random import Random
+from typing import Callable
+
+import numpy as np
+
+from classes.agent import Agent
+from classes.base_agent import BaseAgent
+from classes.episode_buffer import EpisodeBuffer
+from classes.game import Game
+from classes.generator import Generator
+from classes.transition_table import TransitionTable
+
+
+def benchmark_step(track: np.ndarray, n_steps: int, noisy: bool, use_transition_table: bool) -> float:
+    """
+    Measures how fast a game can be played with random actions.
+
+    :return: steps per second
+    """
+    transition_table = TransitionTable.for_racetrack(track) if use_transition_table else None
+    game = Game(racetrack=track, random_state=0, transition_table=transition_table)
+    action_space = Agent(random_state=0).action_space
+    rnd = Random(0)
+    actions = [rnd.choice(action_space) for _ in range(n_steps)]
+    step = game.noisy_step if noisy else game.step
+
+    start = time.perf_counter()
+    for action in actions:
+        step(action)
+        if game.is_finished():
+            game.reset()
+    end = time.perf_counter()
+    return n_steps / (end - start)
+
+
+def benchmark_best_action(track: np.ndarray, agent_factory: Callable[[], BaseAgent], n_calls: int) -> float:
+    """
+    Measures how fast an agent selects the best action, for the states of a few training episodes.
+
+    :return: calls per second
+    """
+    agent = agent_factory()
+    game = Game(racetrack=track, random_state=0, transition_table=TransitionTable.for_racetrack(track))
+    states = []
+    episode = EpisodeBuffer()
+    for _ in range(10):
+        episode.clear()
+        while not game.is_finished() and game.get_n_steps() < 1000:
+            state = game.get_state()
+            action = agent.determine_epsilon_action(state, 0.1)
+            reward = game.noisy_step(action)
+            episode.append(state, action, reward)
+            states.append(state)
+        agent.learn(episode)
+        game.reset()
+    states = [states[i % len(states)] for i in range(n_calls)]
+
+    start = time.perf_counter()
+    for state in states:
+        agent.determine_best_action(state)
+    end = time.perf_counter()
+    return n_calls / (end - start)
+
+
+def benchmark_learn(track: np.ndarray, agent_factory: Callable[[], BaseAgent], n_episodes: int) -> float:
+    """
+    Measures how long an agent needs to learn from an episode of 1000 steps (the maximum length of an episode).
+
+    :return: seconds per episode
+    """
+    agent = agent_factory()
+    game = Game(racetrack=track, random_state=0, transition_table=TransitionTable.for_racetrack(track))
+    episode = EpisodeBuffer()
+    while episode.n_steps < 1000:
+        state = game.get_state()
+        action = agent.determine_rnd_action()
+        reward = game.noisy_step(action)
+        episode.append(state, action, reward)
+        if game.is_finished():
+            game.reset()
+
+    # all agents learn from the buffer, as in the training loops
+    start = time.perf_counter()
+    for _ in range(n_episodes):
+        agent.learn(episode)
+    end = time.perf_counter()
+    return (end - start) / n_episodes
+
+
+def benchmark_generator(seed: int, size: int = 50, n_edges: int = 4, kernel_size: int = 7) -> float:
+    """
+    Measures how long the generator needs to generate a racetrack.
+
+    :return: seconds per racetrack
+    """
+    generator = Generator(random_state=seed)
+    start = time.perf_counter()
+    generator.generate_racetrack_safely(size=size, n_edges=n_edges, kernel_size=kernel_size)
+    end = time.perf_counter()
+    return end - start
+
+
+def summarize(values: list[float]) -> dict:
+    """
+    Returns statistics of repeated measurements
+    """
+    return {
+        "values": values,
+        "mean": float(np.mean(values)),
+        "std": float(np.std(values)),
+        "min": float(np.min(values)),
+        "max": float(np.max(values)),
+    }
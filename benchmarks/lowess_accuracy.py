@@ -0,0 +1,65 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from classes.analysis import lowess_grouped
+from classes.utils import check_positive_int
+
+
+def training_curve(n_rows: int, outlier_fraction: float, seed: int) -> pd.DataFrame:
+    """
+    Returns rewards that look like a training run: a steep start, a slowly changing plateau, noise and outliers.
+    Outliers get the reward of an episode that hit the step limit.
+    """
+    rng = np.random.default_rng(seed)
+    n_games = np.arange(n_rows, dtype=np.float64)
+    reward = -1000 * np.exp(-n_games / 2000) - 30 + 5 * np.sin(n_games / 3000) + rng.normal(0, 20, n_rows)
+    reward[rng.random(n_rows) < outlier_fraction] = -1000
+    return pd.DataFrame({"n_games": n_games, "reward": np.round(reward)})
+
+
+def lowess_error(data: pd.DataFrame, frac: float, n_iterations: int) -> dict:
+    """
+    Compares `lowess_grouped` with the lowess of statsmodels on every row.
+
+    :return: maximal & mean absolute difference, and the mean difference (bias)
+    """
+    from statsmodels.nonparametric.smoothers_lowess import lowess
+
+    smoothed = lowess_grouped(data, "n_games", "reward", None, frac=frac, n_iterations=n_iterations)["reward_smooth"]
+    expected = lowess(data["reward"].to_numpy(), data["n_games"].to_numpy(), frac=frac, it=n_iterations,
+                      return_sorted=False)
+    difference = smoothed.to_numpy() - expected
+    return {
+        "max": float(np.abs(difference).max()),
+        "mean": float(np.abs(difference).mean()),
+        "bias": float(difference.mean()),
+    }
+
+
+def main() -> None:
+    # define arguments
+    parser = argparse.ArgumentParser(prog="racetrack-lowess-accuracy",
+                                     description="Check the binned lowess of classes/analysis.py against statsmodels (needs statsmodels)")
+    parser.add_argument('-n', '--rows', help="number of episodes of the generated training curve",
+                        type=check_positive_int, default=50000)
+    parser.add_argument('-f', '--frac', help="fraction of the rows used to fit each point",
+                        type=float, default=0.07)
+    parser.add_argument('-t', '--tolerance', help="maximal allowed absolute difference to statsmodels",
+                        type=float, default=2.0)
+
+    # parse arguments
+    args = parser.parse_args()
+
+    failed = False
+    for outlier_fraction in (0.0, 0.02):
+        error = lowess_error(training_curve(args.rows, outlier_fraction, seed=0), args.frac, n_iterations=3)
+        print(f"* outliers = {outlier_fraction:<5} max = {error['max']:.4g}  mean = {error['mean']:.4g}  bias = {error['bias']:.4g}")
+        failed |= error["max"] > args.tolerance
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
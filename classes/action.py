@@ -1,4 +1,16 @@
 class Action:
+    __slots__ = ("x", "y", "index")
+
+    __actions: dict[tuple[int, int], "Action"] = {}
+
+    def __new__(cls, x: int, y: int):
+        # actions are interned, i.e. there is only one instance per velocity change
+        action = cls.__actions.get((x, y))
+        if action is None:
+            action = super().__new__(cls)
+            cls.__actions[(x, y)] = action
+        return action
+
     def __init__(self, x: int, y: int):
         """
         :param x: increase in x velocity
@@ -6,6 +18,19 @@ class Action:
         """
         self.x = x
         self.y = y
+        # position of the action in the action space of the agent
+        # only meaningful for actions that change the velocity by at most 1 in each direction
+        self.index = (y + 1) * 3 + (x + 1)
+
+    @staticmethod
+    def from_index(index: int) -> "Action":
+        """
+        Returns the action at the given position in the action space of the agent
+        """
+        return Action(index % 3 - 1, index // 3 - 1)
+
+    def __getnewargs__(self):
+        return self.x, self.y
 
     def __eq__(self, other):
         if isinstance(other, Action):
@@ -16,7 +41,7 @@ class Action:
         return f"Action({self.x},{self.y})"
 
     def __hash__(self):
-        return hash((self.x, self.y))
+        return self.index
 
     def __lt__(self, other):
         return (self.x, self.y) < (other.x, other.y)
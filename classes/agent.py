@@ -1,73 +1,65 @@
 from collections import defaultdict
-from random import Random
-from typing import DefaultDict
+from typing import DefaultDict, Hashable, Iterable
 
 import numpy as np
 
 from .action import Action
+from .base_agent import BaseAgent
+from .episode_buffer import EpisodeBuffer
 from .state import State
 
 
-class Agent:
-    def __init__(self, random_state: int | None):
+class Agent(BaseAgent):
+    def __init__(self, random_state: int | None, gamma: float = 0.9):
         """
         Agent using Reinforcement Learning with Q-Learning and Monte Carlo Control.
 
         :param random_state: Used for generating the randomness of the agent. Pass an int for reproducible output across multiple function calls
+        :param gamma: discount factor of future rewards
         """
-        self.rnd = Random(random_state)
-        self.gamma = 0.9
+        super().__init__(random_state, gamma)
 
         self.q: dict[tuple[State, Action], float] = defaultdict(float)  # expected return for given state-action-pair
         self.q_counts: dict[tuple[State, Action], int] = defaultdict(int)
 
-        self.action_space = [
-            Action(-1, -1),
-            Action(0, -1),
-            Action(1, -1),
-            Action(-1, 0),
-            Action(0, 0),
-            Action(1, 0),
-            Action(-1, 1),
-            Action(0, 1),
-            Action(1, 1)
-        ]
-
-    def determine_epsilon_action(self, state: State, epsilon: float) -> Action:
-        """
-        Returns the best action with probability 1-epsilon, otherwise a random action.
-        """
-        if self.rnd.random() < 1 - epsilon:
-            return self.determine_best_action(state)
-        else:
-            return self.determine_rnd_action()
-
-    def determine_rnd_action(self) -> Action:
-        """
-        Returns a random action
-        """
-        return self.rnd.choice(self.action_space)
+        # indices of the best actions & the best expected return of each learned state
+        # states that have not been learned yet are missing, all their actions are equally good
+        self.best_actions: dict[State, tuple[tuple[int, ...], float]] = {}
 
     def determine_best_action(self, state: State) -> Action:
         """
-        Returns the best action for a given state
+        Returns the best action for a given state.
+        Ties between equally good actions are broken randomly.
         """
-        # calc expected rewards foreach action
-        expected_rewards = np.zeros(len(self.action_space))
-        for i, action in enumerate(self.action_space):
-            expected_rewards[i] = self.q.get((state, action), 0)
-        # select action with the highest expected reward
-        best_action_indices = np.flatnonzero(expected_rewards == np.max(expected_rewards))
+        best = self.best_actions.get(state)
+        best_action_indices = self.TIED_ACTION_INDICES[-1] if best is None else best[0]
         best_action_index = self.rnd.choice(best_action_indices)
         return self.action_space[best_action_index]
 
-    def learn(self, episode: list[tuple[State, Action, int]]) -> None:
+    def refresh_best_actions(self) -> None:
+        """
+        Recomputes the cached best actions of all states.
+        Only needed after the expected returns have been changed from outside the agent, e.g. when loading a checkpoint.
+        """
+        self.best_actions.clear()
+        self._update_best_actions({state for state, _ in self.q.keys()})
+
+    def learn(self, episode: list[tuple[State, Action, int]] | EpisodeBuffer) -> float:
         """
         Learn from a given episode
+
+        :return: mean absolute change of the expected returns of the learned state-action-pairs
         """
+        if isinstance(episode, EpisodeBuffer):
+            return self.__learn_from_buffer(episode)
+
+        total_change = 0.0
+        n_changes = 0
         state_action_pair_counts: DefaultDict[tuple[State, Action], int] = defaultdict(int)
         for state, action, reward in episode:
             state_action_pair_counts[(state, action)] += 1
+        if self._snapshots:
+            self._journal({state for state, _ in state_action_pair_counts})
 
         g = 0
         for state, action, reward in reversed(episode):
@@ -76,7 +68,92 @@ class Agent:
             is_first_state_action_pair = state_action_pair_counts[(state, action)] == 0
 
             if is_first_state_action_pair:
-                n = self.q_counts[(state, action)]
-                q = self.q[(state, action)]
-                self.q[(state, action)] = (q * n + g) / (n + 1)
-                self.q_counts[(state, action)] = n + 1
+                total_change += self.__add_return(state, action, g)
+                n_changes += 1
+        return total_change / max(1, n_changes)
+
+    def __learn_from_buffer(self, episode: EpisodeBuffer) -> float:
+        """
+        Learn from an episode stored in a buffer.
+        The columns of the buffer are read at once, and states are only created for the first visit of each state-action-pair.
+        The returns are accumulated and learned in the same order as in `learn`, thus the results are identical.
+        """
+        rewards = episode.rewards.tolist()
+        returns = [0] * len(rewards)
+        g = 0
+        for i in range(len(rewards) - 1, -1, -1):
+            g = self.gamma * g + rewards[i]
+            returns[i] = g
+
+        positions = episode.positions.astype(np.int64)
+        velocities = episode.velocities.astype(np.int64)
+        actions = episode.actions.astype(np.int64)
+        # same packing as `State.key`, extended by the action index
+        keys = (((positions[:, 0] * 65536 + positions[:, 1]) * 16 + velocities[:, 0] + 8) * 16
+                + velocities[:, 1] + 8) * len(self.action_space) + actions
+        _, first_visits = np.unique(keys, return_index=True)
+
+        positions = positions.tolist()
+        velocities = velocities.tolist()
+        actions = actions.tolist()
+        # `learn` iterates backwards over the episode, thus later first visits are learned first
+        first_visits = np.sort(first_visits)[::-1].tolist()
+        states = [State((positions[i][0], positions[i][1]), (velocities[i][0], velocities[i][1])) for i in first_visits]
+        if self._snapshots:
+            self._journal(set(states))
+
+        total_change = 0.0
+        for state, i in zip(states, first_visits):
+            total_change += self.__add_return(state, self.action_space[actions[i]], returns[i])
+        return total_change / max(1, len(first_visits))
+
+    def __add_return(self, state: State, action: Action, g: float) -> float:
+        """
+        Adds the return of a visit to the running mean of a state-action-pair, and updates the cached best actions of the state.
+        The state has to be journaled before (see `_journal`).
+
+        :return: absolute change of the expected return
+        """
+        key = (state, action)
+        n = self.q_counts[key]
+        q = self.q[key]
+        new_q = (q * n + g) / (n + 1)
+        self.q[key] = new_q
+        self.q_counts[key] = n + 1
+
+        # only the expected return of one action changed, thus the cached best actions can be updated incrementally
+        best = self.best_actions.get(state)
+        best_action_indices, best_value = (self.TIED_ACTION_INDICES[-1], 0.0) if best is None else best
+        if new_q > best_value:
+            self.best_actions[state] = ((action.index,), new_q)
+        elif new_q == best_value:
+            if action.index not in best_action_indices:
+                self.best_actions[state] = (tuple(sorted(best_action_indices + (action.index,))), best_value)
+        elif action.index in best_action_indices:
+            if len(best_action_indices) == 1:
+                self._update_best_actions((state,))
+            else:
+                self.best_actions[state] = (tuple(i for i in best_action_indices if i != action.index), best_value)
+        return abs(new_q - q)
+
+    def _update_best_actions(self, states: Iterable[State]) -> None:
+        """
+        Recomputes the cached best actions of the given states, after their expected returns have changed
+        """
+        for state in states:
+            expected_rewards = self._state_values(state)
+            best_value = expected_rewards.max()
+            best_action_indices = tuple(np.flatnonzero(expected_rewards == best_value).tolist())
+            self.best_actions[state] = (best_action_indices, float(best_value))
+
+    def _state_key(self, state: State) -> Hashable:
+        """
+        Returns the key of a state in the journals of the snapshots
+        """
+        return state
+
+    def _state_values(self, key: Hashable) -> np.ndarray:
+        """
+        Returns the current expected return of each action in a state, given by its key (see `_state_key`)
+        """
+        return np.array([self.q.get((key, action), 0) for action in self.action_space], dtype=np.float64)
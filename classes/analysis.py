@@ -0,0 +1,174 @@
+from typing import Hashable
+
+import numpy as np
+import pandas as pd
+
+
+def rolling_grouped(data: pd.DataFrame, x_name: Hashable, y_name: Hashable, group_name: Hashable | None, window: int,
+                    statistic: str = "median") -> pd.DataFrame:
+    """
+    Applies groupwise smoothing with a centered rolling window to a dataframe.
+    Works on the layout of the statistics in `agent_analysis.ipynb`, also with the column names of an aggregated dataframe like ("reward", "median").
+
+    :param data: the statistics, e.g. the reward of each game
+    :param x_name: column by which the rows of each group are ordered, e.g. the number of the game
+    :param y_name: column to smooth. The smoothed values are added as column `<y_name>_smooth` (for tuples, `_smooth` is added to the first level)
+    :param group_name: column of the groups that are smoothed separately. If `None`, all rows are smoothed together.
+    :param window: number of rows in the window
+    :param statistic: statistic of the window: median, mean, min or max
+    :return: copy of the dataframe with the smoothed column
+    """
+    if statistic not in ("median", "mean", "min", "max"):
+        raise ValueError(f"statistic '{statistic}' not supported")
+
+    df = data.copy()
+    order = np.argsort(df[x_name].to_numpy(), kind="stable")
+    y = df[y_name].iloc[order].reset_index(drop=True)
+    rolling_input = y.groupby(df[group_name].iloc[order].to_numpy()) if group_name is not None else y
+    rolling = rolling_input.rolling(window, center=True, min_periods=1)
+    smoothed = getattr(rolling, statistic)()
+    if group_name is not None:
+        smoothed = smoothed.reset_index(level=0, drop=True)
+
+    values = np.empty(len(df))
+    values[order] = smoothed.sort_index().to_numpy()
+    df[_smooth_name(y_name)] = values
+    return df
+
+
+def lowess_grouped(data: pd.DataFrame, x_name: Hashable, y_name: Hashable, group_name: Hashable | None, frac: float,
+                   n_bins: int | None = 1000, n_iterations: int = 3) -> pd.DataFrame:
+    """
+    Applies groupwise lowess smoothing to a dataframe, like `statsmodels.nonparametric.smoothers_lowess.lowess`.
+    Works on the layout of the statistics in `agent_analysis.ipynb`, also with the column names of an aggregated dataframe like ("reward", "median").
+
+    The rows of each group are put into `n_bins` bins of equal width along x. The smoothed curve is fitted at the bin edges
+    on the weighted means and (co)variances of the bins, and interpolated linearly for every row.
+    The robustness weights are computed for every row from its residual, thus outliers are down-weighted like in statsmodels.
+    The time hardly depends on the number of rows, since all bins are fitted at once with numpy.
+
+    :param data: the statistics, e.g. the reward of each game
+    :param x_name: column of the x values, e.g. the number of the game
+    :param y_name: column to smooth. The smoothed values are added as column `<y_name>_smooth` (for tuples, `_smooth` is added to the first level)
+    :param group_name: column of the groups that are smoothed separately. If `None`, all rows are smoothed together.
+    :param frac: fraction of the rows used to fit each point
+    :param n_bins: number of bins per group. If `None`, every distinct x value is fitted, which needs time and memory quadratic in the number of rows.
+    :param n_iterations: number of robustifying iterations, which reduce the influence of outliers
+    :return: copy of the dataframe with the smoothed column
+    """
+    df = data.copy()
+    x = df[x_name].to_numpy(dtype=np.float64)
+    y = df[y_name].to_numpy(dtype=np.float64)
+    values = np.empty(len(df))
+    if group_name is None:
+        values[:] = _binned_lowess(x, y, frac, n_bins, n_iterations)
+    else:
+        for rows in df.groupby(df[group_name].to_numpy()).indices.values():
+            values[rows] = _binned_lowess(x[rows], y[rows], frac, n_bins, n_iterations)
+    df[_smooth_name(y_name)] = values
+    return df
+
+
+def _smooth_name(y_name: Hashable) -> Hashable:
+    """
+    Returns the name of the smoothed column, in the same way as `lowess_grouped` in `agent_analysis.ipynb`
+    """
+    if isinstance(y_name, str):
+        return y_name + "_smooth"
+    elif isinstance(y_name, tuple):
+        return (y_name[0] + "_smooth",) + y_name[1:]
+    raise ValueError("Type of y_name not supported")
+
+
+def _binned_lowess(x: np.ndarray, y: np.ndarray, frac: float, n_bins: int | None, n_iterations: int) -> np.ndarray:
+    """
+    Returns the lowess smoothed value of every point. See `lowess_grouped`.
+    """
+    if len(x) == 0:
+        return np.zeros(0)
+    if n_bins is None:
+        # every distinct x value is a bin, and is fitted at its own position
+        fit_x, bin_index = np.unique(x, return_inverse=True)
+    else:
+        # the curve is fitted at the bin edges, thus every row lies between two fitted points
+        fit_x = np.linspace(x.min(), x.max(), n_bins + 1)
+        bin_index = np.clip(np.searchsorted(fit_x, x, side="right") - 1, 0, n_bins - 1)
+
+    robustness_weights = np.ones(len(x))
+    fitted_points = None
+    for iteration in range(n_iterations + 1):
+        fitted_points = _weighted_lowess(fit_x, x, y, bin_index, robustness_weights, frac, fitted_points)
+        fitted = np.interp(x, fit_x, fitted_points) if len(fit_x) > 1 else np.full(len(x), fitted_points[0])
+        if iteration == n_iterations:
+            break
+        # the residuals and robustness weights belong to the rows, thus an outlier only loses its own weight
+        residuals = np.abs(y - fitted)
+        scale = float(np.median(residuals))
+        if scale <= 0:
+            break
+        robustness_weights = (1 - np.clip(residuals / (6 * scale), 0, 1) ** 2) ** 2
+    return fitted
+
+
+def _weighted_lowess(fit_x: np.ndarray, x: np.ndarray, y: np.ndarray, bin_index: np.ndarray, weights: np.ndarray,
+                     frac: float, previous: np.ndarray | None, block_size: int = 4096 * 1024) -> np.ndarray:
+    """
+    Fits a locally weighted linear regression at every point of `fit_x`.
+    The neighborhood of a point contains the nearest `frac` of all rows, which are weighted with the tricube kernel
+    and their robustness weights.
+
+    The rows are summarized per bin by their weighted means and the weighted (co)variance of x and y within the bin.
+    The kernel is evaluated once per bin, otherwise the regression is the same as on the single rows.
+
+    :param fit_x: sorted positions the curve is fitted at
+    :param x: x value of each row
+    :param y: y value of each row
+    :param bin_index: bin of each row, the bins are sorted by x
+    :param weights: robustness weight of each row
+    :param previous: fit of the previous iteration, used where all rows of a neighborhood have a weight of 0
+    :param block_size: maximal number of elements of the distance matrix computed at once
+    """
+    counts = np.bincount(bin_index)
+    sum_w = np.bincount(bin_index, weights=weights, minlength=len(counts))
+    has_weight = sum_w > 0
+    safe_sum_w = np.where(has_weight, sum_w, 1)
+    plain_x = np.bincount(bin_index, weights=x, minlength=len(counts)) / np.maximum(counts, 1)
+    bin_x = np.where(has_weight, np.bincount(bin_index, weights=weights * x, minlength=len(counts)) / safe_sum_w, plain_x)
+    bin_y = np.bincount(bin_index, weights=weights * y, minlength=len(counts)) / safe_sum_w
+    dx = x - bin_x[bin_index]
+    bin_xx = np.bincount(bin_index, weights=weights * dx * dx, minlength=len(counts))
+    bin_xy = np.bincount(bin_index, weights=weights * dx * (y - bin_y[bin_index]), minlength=len(counts))
+
+    # empty bins are dropped
+    used_bins = counts > 0
+    counts, sum_w, bin_x, bin_y, bin_xx, bin_xy = (
+        values[used_bins] for values in (counts, sum_w, bin_x, bin_y, bin_xx, bin_xy))
+
+    n = len(bin_x)
+    k = max(1, int(frac * len(x) + 1e-10))  # number of rows in the neighborhood
+    fitted = np.empty(len(fit_x))
+    rows_per_block = max(1, block_size // n)
+    for start in range(0, len(fit_x), rows_per_block):
+        end = min(len(fit_x), start + rows_per_block)
+        distances = np.abs(fit_x[start:end, None] - bin_x[None, :])
+
+        # radius of each neighborhood: distance of the nearest bin, within which there are at least k rows
+        order = np.argsort(distances, axis=1, kind="stable")
+        cumulative_counts = np.cumsum(counts[order], axis=1)
+        nearest = np.minimum(np.argmax(cumulative_counts >= k, axis=1), n - 1)
+        radius = np.take_along_axis(distances, order[np.arange(end - start), nearest][:, None], axis=1)
+        radius = np.where(radius > 0, radius, 1.0)
+
+        kernel = (1 - np.clip(distances / radius, 0, 1) ** 3) ** 3
+        weighted_kernel = kernel * sum_w
+        total_w = weighted_kernel.sum(axis=1)
+        safe_total_w = np.where(total_w > 0, total_w, 1)
+        mean_x = weighted_kernel @ bin_x / safe_total_w
+        mean_y = weighted_kernel @ bin_y / safe_total_w
+        dx = bin_x[None, :] - mean_x[:, None]
+        var_x = (weighted_kernel * dx ** 2).sum(axis=1) + kernel @ bin_xx
+        cov_xy = (weighted_kernel * dx * (bin_y[None, :] - mean_y[:, None])).sum(axis=1) + kernel @ bin_xy
+        slope = np.where(var_x > 1e-12 * np.maximum(total_w, 1e-300), cov_xy / np.where(var_x > 0, var_x, 1), 0.0)
+        fallback = previous[start:end] if previous is not None else mean_y
+        fitted[start:end] = np.where(total_w > 0, mean_y + slope * (fit_x[start:end] - mean_x), fallback)
+    return fitted
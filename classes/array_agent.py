@@ -0,0 +1,117 @@
+from typing import Hashable
+
+import numpy as np
+
+from .action import Action
+from .base_agent import BaseAgent
+from .state import State
+from .transition_table import TransitionTable
+
+
+class ArrayAgent(BaseAgent):
+    def __init__(self, random_state: int | None, racetrack_shape: tuple[int, int], gamma: float = 0.9,
+                 initial_q: float = 0.0):
+        """
+        Agent that stores the expected returns in dense arrays instead of dictionaries.
+        Contains the arrays and the greedy policy, the subclasses define how the agent learns.
+
+        The arrays have the dimensions (row, col, vx + 4, vy + 4, action index), since velocities are limited to [-4, 4].
+
+        :param random_state: Used for generating the randomness of the agent. Pass an int for reproducible output across multiple function calls
+        :param racetrack_shape: shape of the racetrack the agent is trained on
+        :param gamma: discount factor of future rewards
+        :param initial_q: expected return of the state-action-pairs before they have been learned
+        """
+        super().__init__(random_state, gamma)
+        self.initial_q = initial_q
+        shape = (racetrack_shape[0], racetrack_shape[1], 9, 9, len(self.action_space))
+        self.q = np.full(shape, initial_q, dtype=np.float64)  # expected return for given state-action-pair
+        self.q_counts = np.zeros(shape, dtype=np.int64)
+
+        # best actions (as mask with one bit per action, see `TIED_ACTION_INDICES`) & best expected return of each state
+        # indexed by state index (see `TransitionTable`)
+        n_states = racetrack_shape[0] * racetrack_shape[1] * 81
+        self.best_action_masks = np.full(n_states, 2 ** len(self.action_space) - 1, dtype=np.int16)
+        self.best_values = np.full(n_states, initial_q, dtype=np.float64)
+
+    @staticmethod
+    def state_index(state: State) -> tuple[int, int, int, int]:
+        """
+        Returns the index of a state into the first four dimensions of the arrays
+        """
+        return (state.agent_position[0], state.agent_position[1],
+                state.agent_velocity[0] + 4, state.agent_velocity[1] + 4)
+
+    def state_action_index(self, states: np.ndarray, actions: np.ndarray) -> np.ndarray:
+        """
+        Returns the flat index into the arrays for each state-action-pair.
+        States are given as state indices of the transition table, actions as action indices.
+        """
+        return np.asarray(states, dtype=np.int64) * len(self.action_space) + np.asarray(actions, dtype=np.int64)
+
+    def determine_best_action(self, state: State) -> Action:
+        """
+        Returns the best action for a given state.
+        Ties between equally good actions are broken randomly.
+        """
+        position = state.agent_position
+        velocity = state.agent_velocity
+        state_index = TransitionTable.encode_state(self.q.shape[1], position[0], position[1], velocity[0], velocity[1])
+        best_action_indices = self.TIED_ACTION_INDICES[self.best_action_masks[state_index]]
+        best_action_index = self.rnd.choice(best_action_indices)
+        return self.action_space[best_action_index]
+
+    def refresh_best_actions(self) -> None:
+        """
+        Recomputes the cached best actions of all states.
+        Only needed after the expected returns have been changed from outside the agent, e.g. when loading a checkpoint.
+        """
+        self._update_best_actions(np.arange(len(self.best_action_masks)))
+
+    def _update_best_actions(self, state_indices: np.ndarray) -> None:
+        """
+        Recomputes the cached best actions of the given states, after their expected returns have changed
+
+        :param state_indices: state indices (see `TransitionTable`)
+        """
+        expected_rewards = self.q.reshape(-1, len(self.action_space))[state_indices]
+        best_values = expected_rewards.max(axis=1)
+        is_best = expected_rewards == best_values[:, None]
+        self.best_action_masks[state_indices] = is_best @ (1 << np.arange(len(self.action_space)))
+        self.best_values[state_indices] = best_values
+
+    def _update_best_action(self, state_index: int) -> None:
+        """
+        Recomputes the cached best actions of a single state, after its expected returns have changed.
+        Faster than `_update_best_actions` for a single state.
+
+        :param state_index: state index (see `TransitionTable`)
+        """
+        expected_rewards = self.q.reshape(-1, len(self.action_space))[state_index].tolist()
+        best_value = max(expected_rewards)
+        mask = 0
+        for action_index, expected_reward in enumerate(expected_rewards):
+            if expected_reward == best_value:
+                mask |= 1 << action_index
+        self.best_action_masks[state_index] = mask
+        self.best_values[state_index] = best_value
+
+    def _state_key(self, state: State) -> Hashable:
+        """
+        Returns the key of a state in the journals of the snapshots, i.e. its state index (see `TransitionTable`)
+        """
+        position = state.agent_position
+        velocity = state.agent_velocity
+        return TransitionTable.encode_state(self.q.shape[1], position[0], position[1], velocity[0], velocity[1])
+
+    def _state_values(self, key: Hashable) -> np.ndarray:
+        """
+        Returns the current expected return of each action in a state, given by its key (see `_state_key`)
+        """
+        return self.q.reshape(-1, len(self.action_space))[key].copy()
+
+    def _flat_state_index(self, index: tuple[int, ...]) -> int:
+        """
+        Converts the index of a state (or state-action-pair) into the arrays to the state index of the `TransitionTable`
+        """
+        return TransitionTable.encode_state(self.q.shape[1], index[0], index[1], index[2] - 4, index[3] - 4)
@@ -0,0 +1,76 @@
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable
+
+from .base_agent import BaseAgent
+from .memmap_policy import MemmapPolicy
+
+
+class BackgroundEvaluator:
+    def __init__(self, evaluate: Callable[[MemmapPolicy], Any], policy_dir: str | None = None):
+        """
+        Evaluates the policy of an agent on a worker process, while the agent continues to learn.
+        The policy at the time of each submission is exported to its own memory-mapped file (see `MemmapPolicy`),
+        which the worker process opens. Thus the evaluation does not compete with the training for the interpreter lock,
+        the training only pays for the export.
+        Policies are evaluated one after another, thus the results are returned in the order they were submitted.
+
+        :param evaluate: function that evaluates a policy, e.g. by playing a test game. Its return value is the result. Has to be picklable, e.g. a module level function or a `functools.partial` of one.
+        :param policy_dir: directory for the files of the submitted policies. If `None`, a temporary directory is used.
+        """
+        self.evaluate = evaluate
+        self.tmp_dir = tempfile.TemporaryDirectory() if policy_dir is None else None
+        self.policy_dir = policy_dir if policy_dir is not None else self.tmp_dir.name
+        self.executor = ProcessPoolExecutor(max_workers=1)
+        self.pending: deque[tuple[int, str, Future]] = deque()  # episode, policy file & result of submitted evaluations
+
+    def submit(self, episode: int, agent: BaseAgent) -> None:
+        """
+        Exports the current policy of an agent and queues its evaluation. Returns without waiting for the evaluation.
+
+        :param episode: number of the episode after which the policy is evaluated
+        :param agent: the agent, either an `Agent`, an `ArrayAgent` or a `TiledAgent` (see `MemmapPolicy.export`)
+        """
+        path = os.path.join(self.policy_dir, f"policy-{episode}.npy")
+        MemmapPolicy.export(agent, path)
+        policy = MemmapPolicy(path, None)
+        # ties are broken like the agent would break them at this point, but without using its random generator
+        policy.rnd.setstate(agent.rnd.getstate())
+        self.pending.append((episode, path, self.executor.submit(self.evaluate, policy)))
+
+    def poll(self) -> list[tuple[int, Any]]:
+        """
+        Returns the results of all evaluations that have been completed since the last call, without waiting.
+
+        :return: pairs of episode number and result, in the order they were submitted
+        """
+        completed = []
+        while len(self.pending) > 0 and self.pending[0][2].done():
+            completed.append(self.__get())
+        return completed
+
+    def close(self) -> list[tuple[int, Any]]:
+        """
+        Waits until all submitted evaluations are completed, and stops the worker process.
+
+        :return: pairs of episode number and result of the evaluations not returned by `poll`, in the order they were submitted
+        """
+        try:
+            return [self.__get() for _ in range(len(self.pending))]
+        finally:
+            self.executor.shutdown()
+            if self.tmp_dir is not None:
+                self.tmp_dir.cleanup()
+
+    def __get(self) -> tuple[int, Any]:
+        """
+        Returns the next result, and removes the files of its policy. Errors of the evaluation are raised in the calling process.
+        """
+        episode, path, future = self.pending.popleft()
+        try:
+            return episode, future.result()
+        finally:
+            os.remove(path)
+            os.remove(MemmapPolicy.masks_path(path))
@@ -0,0 +1,112 @@
+import weakref
+from abc import ABC, abstractmethod
+from random import Random
+from typing import Hashable, Iterable
+
+import numpy as np
+
+from .action import Action
+from .policy_snapshot import PolicySnapshot
+from .state import State
+
+
+class BaseAgent(ABC):
+    # indices of the actions whose bit is set, for each mask of 9 bits (one bit per action)
+    TIED_ACTION_INDICES = [tuple(i for i in range(9) if mask >> i & 1) for mask in range(2 ** 9)]
+
+    def __init__(self, random_state: int | None, gamma: float = 0.9):
+        """
+        Common part of all agents: the action space, the epsilon-greedy policy and the snapshots.
+        Subclasses store the expected returns, and define how the agent learns.
+
+        :param random_state: Used for generating the randomness of the agent. Pass an int for reproducible output across multiple function calls
+        :param gamma: discount factor of future rewards
+        """
+        self.rnd = Random(random_state)
+        self.gamma = gamma
+
+        self.action_space = [
+            Action(-1, -1),
+            Action(0, -1),
+            Action(1, -1),
+            Action(-1, 0),
+            Action(0, 0),
+            Action(1, 0),
+            Action(-1, 1),
+            Action(0, 1),
+            Action(1, 1)
+        ]
+
+        self._snapshots: weakref.WeakSet[PolicySnapshot] = weakref.WeakSet()  # living snapshots, see `snapshot`
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_snapshots"]  # snapshots belong to the original agent
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._snapshots = weakref.WeakSet()
+
+    def snapshot(self) -> PolicySnapshot:
+        """
+        Returns a read-only greedy policy of the agent, which is not affected by further learning.
+        Takes constant time, since the expected returns are only copied when they change (see `PolicySnapshot`).
+        """
+        snapshot = PolicySnapshot(self)
+        self._snapshots.add(snapshot)
+        return snapshot
+
+    def determine_epsilon_action(self, state: State, epsilon: float) -> Action:
+        """
+        Returns the best action with probability 1-epsilon, otherwise a random action.
+        """
+        if self.rnd.random() < 1 - epsilon:
+            return self.determine_best_action(state)
+        else:
+            return self.determine_rnd_action()
+
+    def determine_rnd_action(self) -> Action:
+        """
+        Returns a random action
+        """
+        return self.rnd.choice(self.action_space)
+
+    @abstractmethod
+    def determine_best_action(self, state: State) -> Action:
+        """
+        Returns the best action for a given state.
+        Ties between equally good actions are broken randomly.
+        """
+
+    @abstractmethod
+    def refresh_best_actions(self) -> None:
+        """
+        Recomputes the cached best actions of all states.
+        Only needed after the expected returns have been changed from outside the agent, e.g. when loading a checkpoint.
+        """
+
+    @abstractmethod
+    def _state_key(self, state: State) -> Hashable:
+        """
+        Returns the key of a state in the journals of the snapshots
+        """
+
+    @abstractmethod
+    def _state_values(self, key: Hashable) -> np.ndarray:
+        """
+        Returns the current expected return of each action in a state, given by its key (see `_state_key`)
+        """
+
+    def _journal(self, keys: Iterable[Hashable]) -> None:
+        """
+        Saves the current expected returns of states into the journal of every living snapshot, that has not saved them yet.
+        Has to be called right before the expected returns of the states are changed.
+
+        :param keys: keys of the states (see `_state_key`)
+        """
+        for snapshot in list(self._snapshots):
+            journal = snapshot.journal
+            for key in keys:
+                if key not in journal:
+                    journal[key] = self._state_values(key)
@@ -1,4 +1,6 @@
 class Car:
+    __slots__ = ("pos", "vel")
+
     def __init__(self, initial_pos: tuple[int, int], initial_vel: tuple[int, int]):
         self.pos = initial_pos
         self.vel = initial_vel
@@ -0,0 +1,129 @@
+import os
+from random import Random
+
+import numpy as np
+
+from .agent import Agent
+from .array_agent import ArrayAgent
+from .game import Game
+from .state import State
+from .tiled_agent import TiledAgent
+
+
+def save_checkpoint(path: str, agent: Agent | ArrayAgent | TiledAgent, game: Game, n_episodes: int) -> None:
+    """
+    Saves the learned values of an agent, the state of its game and the number of trained episodes.
+    Only state-action-pairs that have been visited or have an expected return other than the initial one are stored, as flat arrays in an uncompressed npz file.
+
+    :param path: file to write the checkpoint to
+    :param agent: the agent to save, either an `Agent`, an `ArrayAgent` (`DenseAgent`, `QLearningAgent`) or a `TiledAgent`
+    :param game: the game the agent is trained on
+    :param n_episodes: number of episodes the agent has been trained
+    """
+    if isinstance(agent, ArrayAgent):
+        # expected returns can be set without visits, e.g. by `ValueIteration.to_agent`
+        rows, cols, vx, vy, actions = np.nonzero((agent.q_counts != 0) | (agent.q != agent.initial_q))
+        q = agent.q[rows, cols, vx, vy, actions]
+        q_counts = agent.q_counts[rows, cols, vx, vy, actions]
+        vx = vx - 4
+        vy = vy - 4
+    elif isinstance(agent, TiledAgent):
+        rows, cols, vx, vy, actions, q, q_counts = agent.q.nonzero()
+        vx = vx - 4
+        vy = vy - 4
+    elif isinstance(agent, Agent):
+        keys = list(dict.fromkeys([*agent.q_counts.keys(), *agent.q.keys()]))
+        rows = np.array([state.agent_position[0] for state, _ in keys], dtype=np.int64)
+        cols = np.array([state.agent_position[1] for state, _ in keys], dtype=np.int64)
+        vx = np.array([state.agent_velocity[0] for state, _ in keys], dtype=np.int64)
+        vy = np.array([state.agent_velocity[1] for state, _ in keys], dtype=np.int64)
+        actions = np.array([action.index for _, action in keys], dtype=np.int64)
+        q = np.array([agent.q[key] for key in keys], dtype=np.float64)
+        q_counts = np.array([agent.q_counts.get(key, 0) for key in keys], dtype=np.int64)
+    else:
+        raise TypeError(f"checkpoints of a {type(agent).__name__} are not supported")
+
+    # write under a temporary name first, so that an interrupted write does not destroy an existing checkpoint
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path,
+             racetrack=game.racetrack.astype(np.int8),
+             gamma=agent.gamma,
+             initial_q=agent.initial_q if isinstance(agent, ArrayAgent) else 0.0,
+             n_episodes=n_episodes,
+             rows=rows.astype(np.int32),
+             cols=cols.astype(np.int32),
+             vx=vx.astype(np.int8),
+             vy=vy.astype(np.int8),
+             actions=actions.astype(np.int8),
+             q=q,
+             q_counts=q_counts.astype(np.int32),
+             agent_rnd=_random_state_to_array(agent.rnd),
+             game_rnd=_random_state_to_array(game.rnd),
+             car=np.array([*game.car.pos, *game.car.vel, game.n_steps], dtype=np.int64))
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str, agent: Agent | ArrayAgent | TiledAgent, game: Game) -> int:
+    """
+    Restores an agent and its game from a checkpoint created with `save_checkpoint`.
+
+    :param path: file to read the checkpoint from
+    :param agent: newly created agent, whose values are replaced
+    :param game: newly created game on the same racetrack as the checkpoint, whose state is replaced
+    :return: number of episodes the agent has been trained
+    """
+    if not isinstance(agent, (Agent, ArrayAgent, TiledAgent)):
+        raise TypeError(f"checkpoints of a {type(agent).__name__} are not supported")
+    with np.load(path) as data:
+        if data["racetrack"].shape != game.racetrack.shape or np.any(data["racetrack"] != game.racetrack):
+            raise ValueError(f"checkpoint '{path}' was created on a different racetrack")
+
+        rows, cols, vx, vy, actions = (data[name].astype(np.int64) for name in ["rows", "cols", "vx", "vy", "actions"])
+        q = data["q"]
+        q_counts = data["q_counts"].astype(np.int64)
+
+        agent.gamma = float(data["gamma"])
+        if isinstance(agent, ArrayAgent):
+            agent.initial_q = float(data["initial_q"]) if "initial_q" in data else 0.0  # older checkpoints
+            agent.q[:] = agent.initial_q
+            agent.q_counts[:] = 0
+            agent.q[rows, cols, vx + 4, vy + 4, actions] = q
+            agent.q_counts[rows, cols, vx + 4, vy + 4, actions] = q_counts
+        elif isinstance(agent, TiledAgent):
+            agent.q.clear()
+            agent.q.set_values(rows, cols, vx + 4, vy + 4, actions, q, q_counts)
+        else:
+            agent.q.clear()
+            agent.q_counts.clear()
+            for i in range(len(q)):
+                state = State((int(rows[i]), int(cols[i])), (int(vx[i]), int(vy[i])))
+                key = (state, agent.action_space[actions[i]])
+                agent.q[key] = float(q[i])
+                agent.q_counts[key] = int(q_counts[i])
+
+        agent.refresh_best_actions()
+        agent.rnd.setstate(_array_to_random_state(data["agent_rnd"]))
+        game.rnd.setstate(_array_to_random_state(data["game_rnd"]))
+        car = data["car"].tolist()
+        game.car.pos = (car[0], car[1])
+        game.car.vel = (car[2], car[3])
+        game.n_steps = car[4]
+        return int(data["n_episodes"])
+
+
+def _random_state_to_array(rnd: Random) -> np.ndarray:
+    """
+    Converts the internal state of a random generator into an array.
+    Layout: version, gauss_next (nan if not set), followed by the state of the mersenne twister.
+    The state of the mersenne twister consists of 32-bit integers, thus it is stored exactly as float64.
+    """
+    version, internal_state, gauss_next = rnd.getstate()
+    return np.array([version, np.nan if gauss_next is None else gauss_next, *internal_state], dtype=np.float64)
+
+
+def _array_to_random_state(array: np.ndarray) -> tuple:
+    """
+    Converts an array created with `_random_state_to_array` back into the internal state of a random generator.
+    """
+    gauss_next = None if np.isnan(array[1]) else float(array[1])
+    return int(array[0]), tuple(int(value) for value in array[2:]), gauss_next
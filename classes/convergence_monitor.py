@@ -0,0 +1,83 @@
+from collections import deque
+
+import numpy as np
+
+
+class ConvergenceMonitor:
+    def __init__(self, window: int = 500, patience: int = 3, tolerance: float = 0.01,
+                 q_change_tolerance: float | None = None):
+        """
+        Keeps statistics of the last episodes of a training, and detects when the training reached a plateau.
+
+        The statistics are checked after every `window` episodes. The training has converged,
+        if the mean reward of the window did not improve on the best window by more than `tolerance` (relative)
+        in `patience` checks in a row, and (if given) the mean change of the expected returns is below `q_change_tolerance`.
+
+        :param window: number of episodes the statistics are computed over, and after which they are checked
+        :param patience: how many checks in a row without improvement are needed to stop the training
+        :param tolerance: minimal relative improvement of the mean reward, that counts as improvement
+        :param q_change_tolerance: maximal mean absolute change of the expected returns (see `Agent.learn`) of a plateau. If `None`, it is not checked.
+        """
+        if window < 1:
+            raise ValueError(f"window must be at least 1, got {window}")
+        if patience < 1:
+            raise ValueError(f"patience must be at least 1, got {patience}")
+        self.window = window
+        self.patience = patience
+        self.tolerance = tolerance
+        self.q_change_tolerance = q_change_tolerance
+
+        self.rewards: deque[float] = deque(maxlen=window)
+        self.n_steps: deque[int] = deque(maxlen=window)
+        self.q_changes: deque[float] = deque(maxlen=window)
+        self.n_episodes = 0
+
+        self.best_mean_reward = -np.inf  # mean reward of the best window
+        self.best_episode = 0  # last episode of the best window
+        self.checks_without_improvement = 0
+        self.converged_episode: int | None = None  # episode after which the training did not improve anymore
+        self.history: list[dict] = []  # statistics of each check
+
+    def update(self, reward: float, n_steps: int, q_change: float) -> bool:
+        """
+        Adds the statistics of an episode.
+
+        :param reward: total reward of the episode
+        :param n_steps: number of steps of the episode
+        :param q_change: mean absolute change of the expected returns in the episode, as returned by `Agent.learn`
+        :return: True if the training has converged
+        """
+        self.rewards.append(reward)
+        self.n_steps.append(n_steps)
+        self.q_changes.append(q_change)
+        self.n_episodes += 1
+        if self.n_episodes % self.window != 0:
+            return False
+
+        statistics = self.statistics()
+        self.history.append(statistics)
+        if len(self.history) == 1 or statistics["mean_reward"] > self.best_mean_reward + self.tolerance * abs(self.best_mean_reward):
+            self.best_mean_reward = statistics["mean_reward"]
+            self.best_episode = self.n_episodes
+            self.checks_without_improvement = 0
+            return False
+
+        self.checks_without_improvement += 1
+        q_settled = self.q_change_tolerance is None or statistics["mean_q_change"] < self.q_change_tolerance
+        if self.checks_without_improvement >= self.patience and q_settled:
+            self.converged_episode = self.best_episode
+            return True
+        return False
+
+    def statistics(self) -> dict:
+        """
+        Returns the statistics of the last window
+        """
+        return {
+            "episode": self.n_episodes,
+            "mean_reward": float(np.mean(self.rewards)),
+            "median_reward": float(np.median(self.rewards)),
+            "mean_steps": float(np.mean(self.n_steps)),
+            "median_steps": float(np.median(self.n_steps)),
+            "mean_q_change": float(np.mean(self.q_changes)),
+        }
@@ -0,0 +1,11 @@
+from enum import IntEnum
+
+
+class CrashType(IntEnum):
+    """
+    Reason why the car has been reset to the start line in a step.
+    """
+    NONE = 0  # the car has not crashed
+    OUT_OF_BOUNDS = 1  # the car would be outside the map
+    CORNER_CUT = 2  # the car cuts a corner, i.e. its path crosses cells outside the track
+    OFF_TRACK = 3  # the car would stop on a cell outside the track
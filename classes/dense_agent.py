@@ -0,0 +1,173 @@
+from collections import defaultdict
+from typing import DefaultDict, Sequence
+
+import numpy as np
+
+from .action import Action
+from .array_agent import ArrayAgent
+from .episode_buffer import EpisodeBuffer
+from .state import State
+from .transition_table import TransitionTable
+
+
+class DenseAgent(ArrayAgent):
+    def __init__(self, random_state: int | None, racetrack_shape: tuple[int, int], gamma: float = 0.9):
+        """
+        Agent using Monte Carlo Control, that stores the expected returns in dense arrays instead of dictionaries (see `ArrayAgent`).
+        Behaves exactly like `Agent` for the same random state.
+
+        :param random_state: Used for generating the randomness of the agent. Pass an int for reproducible output across multiple function calls
+        :param racetrack_shape: shape of the racetrack the agent is trained on
+        :param gamma: discount factor of future rewards
+        """
+        super().__init__(random_state, racetrack_shape, gamma)
+
+    def learn(self, episode: list[tuple[State, Action, int]] | EpisodeBuffer) -> float:
+        """
+        Learn from a given episode
+
+        :return: mean absolute change of the expected returns of the learned state-action-pairs
+        """
+        if isinstance(episode, EpisodeBuffer):
+            return self.__learn_from_buffer(episode)
+
+        total_change = 0.0
+        n_changes = 0
+        state_action_pair_counts: DefaultDict[tuple[int, ...], int] = defaultdict(int)
+        indices = [self.state_index(state) + (action.index,) for state, action, reward in episode]
+        touched_states = set()
+        for index in indices:
+            state_action_pair_counts[index] += 1
+
+        g = 0
+        for index, (state, action, reward) in zip(reversed(indices), reversed(episode)):
+            g = self.gamma * g + reward
+            state_action_pair_counts[index] -= 1
+            is_first_state_action_pair = state_action_pair_counts[index] == 0
+
+            if is_first_state_action_pair:
+                state_index = self._flat_state_index(index)
+                touched_states.add(state_index)
+                if self._snapshots:
+                    self._journal((state_index,))
+                n = self.q_counts[index]
+                q = self.q[index]
+                self.q[index] = (q * n + g) / (n + 1)
+                self.q_counts[index] = n + 1
+                total_change += abs(self.q[index] - q)
+                n_changes += 1
+
+        self._update_best_actions(np.fromiter(touched_states, dtype=np.int64, count=len(touched_states)))
+        return total_change / max(1, n_changes)
+
+    def __learn_from_buffer(self, episode: EpisodeBuffer) -> float:
+        """
+        Learn from an episode stored in a buffer.
+        The returns are accumulated in the same order as in `learn`, thus the results are identical.
+        """
+        rewards = episode.rewards.tolist()
+        returns = np.empty(len(rewards))
+        g = 0
+        for i in range(len(rewards) - 1, -1, -1):
+            g = self.gamma * g + rewards[i]
+            returns[i] = g
+
+        positions = episode.positions.astype(np.int64)
+        velocities = episode.velocities.astype(np.int64) + 4
+        index = (positions[:, 0], positions[:, 1], velocities[:, 0], velocities[:, 1], episode.actions.astype(np.int64))
+        _, first_visits = np.unique(np.ravel_multi_index(index, self.q.shape), return_index=True)
+        index = tuple(i[first_visits] for i in index)
+
+        touched_states = np.unique(TransitionTable.encode_state(self.q.shape[1], index[0], index[1],
+                                                                index[2] - 4, index[3] - 4))
+        if self._snapshots:
+            self._journal(touched_states.tolist())
+        n = self.q_counts[index]
+        old_q = self.q[index]
+        new_q = (old_q * n + returns[first_visits]) / (n + 1)
+        self.q[index] = new_q
+        self.q_counts[index] = n + 1
+        self._update_best_actions(touched_states)
+        return float(np.abs(new_q - old_q).mean()) if len(new_q) > 0 else 0.0
+
+    def learn_batch(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+                    episode_lengths: Sequence[int] | None = None) -> float:
+        """
+        Learn from one or many episodes given as arrays.
+        Equivalent to calling `learn` for each episode, but without a python loop over the steps.
+
+        :param states: state index (see `TransitionTable`) of each step, all episodes concatenated
+        :param actions: action index of each step
+        :param rewards: reward of each step
+        :param episode_lengths: number of steps of each episode. If `None`, all steps belong to a single episode.
+        :return: mean absolute change of the expected returns of the learned state-action-pairs
+        """
+        pairs, returns = self.first_visit_returns(states, actions, rewards, episode_lengths)
+        unique_pairs, inverse = np.unique(pairs, return_inverse=True)
+        sums = np.bincount(inverse, weights=returns, minlength=len(unique_pairs))
+        counts = np.bincount(inverse, minlength=len(unique_pairs))
+        return self.merge_statistics(unique_pairs, sums, counts)
+
+    def first_visit_returns(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+                            episode_lengths: Sequence[int] | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Computes the discounted return of the first visit of each state-action-pair in each episode.
+
+        :return: flat index of the state-action-pairs (see `state_action_index`) and their returns
+        """
+        pairs = self.state_action_index(states, actions)
+        rewards = np.asarray(rewards, dtype=np.float64)
+        if episode_lengths is None:
+            episode_lengths = [len(pairs)]
+
+        returns = np.empty(len(rewards))
+        episode_ids = np.repeat(np.arange(len(episode_lengths)), episode_lengths)
+        end = 0
+        for length in episode_lengths:
+            returns[end:end + length] = self.__discounted_returns(rewards[end:end + length])
+            end += length
+
+        # first occurrence of each pair within its episode
+        _, first_visits = np.unique(episode_ids * self.q.size + pairs, return_index=True)
+        return pairs[first_visits], returns[first_visits]
+
+    def merge_statistics(self, pairs: np.ndarray, sums: np.ndarray, counts: np.ndarray) -> float:
+        """
+        Merges the summed returns of state-action-pairs into the running means of the agent.
+
+        :param pairs: unique flat indices of the state-action-pairs
+        :param sums: sum of the returns of each pair
+        :param counts: number of returns of each pair
+        :return: mean absolute change of the expected returns of the pairs
+        """
+        touched_states = np.unique(np.asarray(pairs) // len(self.action_space))
+        if self._snapshots:
+            self._journal(touched_states.tolist())
+        q = self.q.reshape(-1)
+        q_counts = self.q_counts.reshape(-1)
+        n = q_counts[pairs]
+        old_q = q[pairs]
+        new_q = (old_q * n + sums) / (n + counts)
+        q[pairs] = new_q
+        q_counts[pairs] = n + counts
+        self._update_best_actions(touched_states)
+        return float(np.abs(new_q - old_q).mean()) if len(new_q) > 0 else 0.0
+
+    def __discounted_returns(self, rewards: np.ndarray) -> np.ndarray:
+        """
+        Computes the discounted return of every step of an episode with a reverse cumulative sum.
+        Long episodes are processed in blocks, so that the discount factors do not underflow.
+        """
+        if self.gamma == 0:
+            return rewards.copy()
+        block_size = max(1, len(rewards)) if self.gamma >= 1 else max(1, int(np.log(1e-150) / np.log(self.gamma)))
+
+        returns = np.empty(len(rewards))
+        g = 0.0  # return of the step after the current block
+        for end in range(len(rewards), 0, -block_size):
+            start = max(0, end - block_size)
+            discounts = self.gamma ** np.arange(end - start)
+            discounted_rewards = rewards[start:end] * discounts
+            returns[start:end] = (np.cumsum(discounted_rewards[::-1])[::-1] + g * self.gamma ** (end - start)) / discounts
+            g = returns[start]
+        return returns
@@ -0,0 +1,145 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+
+import numpy as np
+
+from .dense_agent import DenseAgent
+from .episode_buffer import EpisodeBuffer
+from .game import Game
+from .memmap_policy import MemmapPolicy
+from .transition_table import TransitionTable
+
+
+class DistributedTrainer:
+    def __init__(self, agent: DenseAgent, racetrack: np.ndarray, n_workers: int | None = None,
+                 episodes_per_worker: int = 50, epsilon: float = 0.1, random_state: int | None = None,
+                 policy_dir: str | None = None):
+        """
+        Trains an agent with Monte Carlo Control on several processes.
+
+        The training runs in rounds. In each round, every actor process plays episodes with `Game.noisy_step`
+        against the policy of the agent at the start of the round (see `MemmapPolicy`), and sums up the first-visit returns
+        of each state-action-pair locally. Afterwards the learner merges the sums and counts of all actors into the
+        agent (see `DenseAgent.merge_statistics`). Since the expected returns are running means, the merge is exact:
+        it gives the same expected returns as learning from all episodes of the round one after another.
+        The policy of the actors is refreshed after every round.
+
+        :param agent: the agent to train
+        :param racetrack: the racetrack the agent is trained on
+        :param n_workers: number of actor processes. If `None`, all cores are used.
+        :param episodes_per_worker: how many episodes each actor plays per round
+        :param epsilon: probability of a random action during training
+        :param random_state: Used for generating the randomness of the actors. Pass an int for reproducible output across multiple function calls
+        :param policy_dir: directory for the file of the shared policy. If `None`, a temporary directory is used.
+        """
+        self.agent = agent
+        self.racetrack = racetrack
+        self.n_workers = n_workers if n_workers is not None else os.cpu_count()
+        self.episodes_per_worker = episodes_per_worker
+        self.epsilon = epsilon
+        self.rnd = Random(random_state)
+
+        self.tmp_dir = tempfile.TemporaryDirectory() if policy_dir is None else None
+        self.policy_path = os.path.join(policy_dir if policy_dir is not None else self.tmp_dir.name, "policy.npy")
+        self.executor = ProcessPoolExecutor(max_workers=self.n_workers)
+
+    def train_round(self, n_episodes: int | None = None) -> tuple[np.ndarray, np.ndarray, float]:
+        """
+        Plays one round of episodes on the actor processes, and merges their statistics into the agent.
+
+        :param n_episodes: number of episodes of the round, which are split evenly between the actors. If `None`, every actor plays `episodes_per_worker` episodes.
+        :return: number of steps & reward of each episode, and the mean absolute change of the merged expected returns
+        """
+        if n_episodes is None:
+            n_episodes = self.n_workers * self.episodes_per_worker
+        self.__publish_policy()
+
+        counts = [n_episodes // self.n_workers + (worker < n_episodes % self.n_workers)
+                  for worker in range(self.n_workers)]
+        futures = [self.executor.submit(_run_actor, self.policy_path, self.racetrack, self.agent.gamma, self.epsilon,
+                                        count, self.rnd.randint(0, 100000000), self.rnd.randint(0, 100000000))
+                   for count in counts if count > 0]
+
+        # the results are merged in the order of the actors, thus the training is reproducible
+        results = [future.result() for future in futures]
+        pairs, inverse = np.unique(np.concatenate([result[0] for result in results]), return_inverse=True)
+        sums = np.bincount(inverse, weights=np.concatenate([result[1] for result in results]), minlength=len(pairs))
+        counts = np.bincount(inverse, weights=np.concatenate([result[2] for result in results]),
+                             minlength=len(pairs)).astype(np.int64)
+        q_change = self.agent.merge_statistics(pairs, sums, counts)
+
+        n_steps = np.concatenate([result[3] for result in results])
+        rewards = np.concatenate([result[4] for result in results])
+        return n_steps, rewards, q_change
+
+    def close(self) -> None:
+        """
+        Stops the actor processes and removes the temporary policy file
+        """
+        self.executor.shutdown()
+        if self.tmp_dir is not None:
+            self.tmp_dir.cleanup()
+
+    def __publish_policy(self) -> None:
+        """
+        Writes the current expected returns and best actions of the agent to the policy files of the actors.
+        The files are written under a temporary name first, so that an actor never opens a partially written policy.
+        """
+        tmp_path = self.policy_path[:-len(".npy")] + ".tmp.npy"
+        MemmapPolicy.export(self.agent, tmp_path)
+        os.replace(MemmapPolicy.masks_path(tmp_path), MemmapPolicy.masks_path(self.policy_path))
+        os.replace(tmp_path, self.policy_path)
+
+
+def _run_actor(policy_path: str, racetrack: np.ndarray, gamma: float, epsilon: float, n_episodes: int,
+               game_random_state: int, policy_random_state: int) -> tuple[np.ndarray, ...]:
+    """
+    Plays episodes against a fixed policy, and sums up the first-visit return of each state-action-pair.
+    Runs in a worker process.
+
+    :return: unique flat indices of the state-action-pairs (see `DenseAgent.state_action_index`), the sum & count of their returns, and the number of steps & reward of each episode
+    """
+    policy = MemmapPolicy(policy_path, policy_random_state)
+    game = Game(racetrack=racetrack, random_state=game_random_state,
+                transition_table=TransitionTable.for_racetrack(racetrack))
+    n_cols = policy.q.shape[1]
+    n_actions = policy.q.shape[-1]
+    episode = EpisodeBuffer()
+
+    pairs = []
+    returns = []
+    n_steps = np.zeros(n_episodes, dtype=np.int32)
+    rewards = np.zeros(n_episodes, dtype=np.int32)
+    for i in range(n_episodes):
+        episode.clear()
+        while not game.is_finished() and game.get_n_steps() < 1000:
+            state = game.get_state()
+            action = policy.determine_epsilon_action(state, epsilon)
+            reward = game.noisy_step(action)
+            episode.append(state, action, reward)
+
+        # discounted returns, accumulated in the same order as in `Agent.learn`
+        episode_rewards = episode.rewards.tolist()
+        episode_returns = np.empty(len(episode_rewards))
+        g = 0
+        for j in range(len(episode_rewards) - 1, -1, -1):
+            g = gamma * g + episode_rewards[j]
+            episode_returns[j] = g
+
+        positions = episode.positions.astype(np.int64)
+        velocities = episode.velocities.astype(np.int64)
+        states = TransitionTable.encode_state(n_cols, positions[:, 0], positions[:, 1], velocities[:, 0], velocities[:, 1])
+        episode_pairs = states * n_actions + episode.actions.astype(np.int64)
+        _, first_visits = np.unique(episode_pairs, return_index=True)
+        pairs.append(episode_pairs[first_visits])
+        returns.append(episode_returns[first_visits])
+        n_steps[i] = game.get_n_steps()
+        rewards[i] = episode.total_reward()
+        game.reset()
+
+    unique_pairs, inverse = np.unique(np.concatenate(pairs), return_inverse=True)
+    sums = np.bincount(inverse, weights=np.concatenate(returns), minlength=len(unique_pairs))
+    counts = np.bincount(inverse, minlength=len(unique_pairs))
+    return unique_pairs, sums, counts, n_steps, rewards
@@ -0,0 +1,118 @@
+import struct
+
+import numpy as np
+
+from .action import Action
+from .state import State
+
+
+class EpisodeBuffer:
+    """
+    Preallocated storage for the steps of one episode, that is reused for every episode.
+    Each step is stored as a row of a structured array, instead of as a tuple of objects.
+
+    Iterating over the buffer yields (State, Action, reward) tuples, like a list-based episode.
+    """
+
+    dtype = np.dtype([
+        ("position", np.int16, (2,)),
+        ("velocity", np.int16, (2,)),
+        ("action", np.int8),
+        ("reward", np.int8),
+    ])
+    row_format = struct.Struct("=hhhhbb")  # same memory layout as one row of `dtype`
+
+    def __init__(self, capacity: int = 1001):
+        """
+        :param capacity: number of steps that fit into the buffer without reallocating. By default 1000 steps plus the final state for drawing.
+        """
+        self.data = np.zeros(capacity, dtype=self.dtype)
+        self.memory = memoryview(self.data).cast("B")
+        self.n_steps = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["memory"]  # views cannot be pickled, e.g. to return an episode from a worker process
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.memory = memoryview(self.data).cast("B")
+
+    def clear(self) -> None:
+        """
+        Removes all steps, but keeps the allocated memory
+        """
+        self.n_steps = 0
+
+    def append(self, state: State, action: Action, reward: int) -> None:
+        """
+        Writes a step at the end of the buffer
+        """
+        if self.n_steps == len(self.data):
+            self.data = np.concatenate([self.data, np.zeros(len(self.data), dtype=self.dtype)])
+            self.memory = memoryview(self.data).cast("B")
+        # packing the values directly into the memory is much faster than assigning a row of the structured array
+        self.row_format.pack_into(self.memory, self.n_steps * self.dtype.itemsize,
+                                  state.agent_position[0], state.agent_position[1],
+                                  state.agent_velocity[0], state.agent_velocity[1], action.index, reward)
+        self.n_steps += 1
+
+    def copy(self) -> "EpisodeBuffer":
+        """
+        Returns a copy with only the filled part of the buffer
+        """
+        buffer = EpisodeBuffer(max(self.n_steps, 1))
+        buffer.data[:self.n_steps] = self.data[:self.n_steps]
+        buffer.n_steps = self.n_steps
+        return buffer
+
+    @property
+    def positions(self) -> np.ndarray:
+        """
+        Position of each step, shape (n_steps, 2)
+        """
+        return self.data["position"][:self.n_steps]
+
+    @property
+    def velocities(self) -> np.ndarray:
+        """
+        Velocity of each step, shape (n_steps, 2)
+        """
+        return self.data["velocity"][:self.n_steps]
+
+    @property
+    def actions(self) -> np.ndarray:
+        """
+        Action index of each step (see `Action.index`)
+        """
+        return self.data["action"][:self.n_steps]
+
+    @property
+    def rewards(self) -> np.ndarray:
+        """
+        Reward of each step
+        """
+        return self.data["reward"][:self.n_steps]
+
+    def total_reward(self) -> int:
+        """
+        Returns the sum of all rewards of the episode
+        """
+        return int(self.rewards.sum(dtype=np.int64))
+
+    def __len__(self) -> int:
+        return self.n_steps
+
+    def __getitem__(self, index: int) -> tuple[State, Action, int]:
+        if index < 0:
+            index += self.n_steps
+        if not 0 <= index < self.n_steps:
+            raise IndexError("episode buffer index out of range")
+        row = self.data[index]
+        state = State(tuple(row["position"].tolist()), tuple(row["velocity"].tolist()))
+        return state, Action.from_index(int(row["action"])), int(row["reward"])
+
+    def __iter__(self):
+        for i in range(self.n_steps):
+            yield self[i]
@@ -0,0 +1,91 @@
+import os
+
+import cv2.cv2 as cv2
+import numpy as np
+
+from .action import Action
+from .episode_buffer import EpisodeBuffer
+from .state import State
+
+
+class EpisodeRenderer:
+    # RGB color of each cell type: OFF_TRACK, ON_TRACK, START, FINISH
+    COLORS = np.array([
+        [255, 255, 255],  # white
+        [0, 0, 0],  # black
+        [255, 255, 0],  # yellow
+        [0, 128, 0],  # green
+    ], dtype=np.uint8)
+    PATH_COLOR = np.array([255, 0, 0], dtype=np.uint8)  # red
+
+    def __init__(self, cell_size: int = 12):
+        """
+        Renders a game into an RGB image, without a display.
+        The image looks like the one of `EpisodeVisualizer`: the first row of the racetrack is at the bottom,
+        the cells the car visited are red.
+
+        :param cell_size: width and height of a cell in pixels
+        """
+        self.cell_size = cell_size
+
+    def render(self, track: np.ndarray, positions: np.ndarray | list[tuple[int, int]] | None = None,
+               cell_size: int | None = None) -> np.ndarray:
+        """
+        Renders a racetrack and the positions of a car.
+
+        :param track: the racetrack
+        :param positions: positions (row, col) the car visited. If `None`, only the racetrack is rendered.
+        :param cell_size: width and height of a cell in pixels. If `None`, the cell size of the renderer is used.
+        :return: RGB image with shape (rows * cell_size, cols * cell_size, 3)
+        """
+        if cell_size is None:
+            cell_size = self.cell_size
+
+        cells = self.COLORS[np.clip(track.astype(np.int64), 0, 3)]
+        if positions is not None and len(positions) > 0:
+            positions = np.asarray(positions, dtype=np.int64)
+            cells[positions[:, 0], positions[:, 1]] = self.PATH_COLOR
+
+        # the first row is drawn at the bottom
+        cells = cells[::-1]
+        return np.repeat(np.repeat(cells, cell_size, axis=0), cell_size, axis=1)
+
+    def render_episode(self, track: np.ndarray, episode: list[tuple[State, Action, int]] | EpisodeBuffer,
+                       cell_size: int | None = None) -> np.ndarray:
+        """
+        Renders a racetrack and the path of the car in an episode.
+
+        :return: RGB image with shape (rows * cell_size, cols * cell_size, 3)
+        """
+        if isinstance(episode, EpisodeBuffer):
+            positions = episode.positions
+        else:
+            positions = [state.agent_position for state, _, _ in episode]
+        return self.render(track, positions, cell_size)
+
+    def save_episode(self, path: str, track: np.ndarray, episode: list[tuple[State, Action, int]] | EpisodeBuffer) -> None:
+        """
+        Renders an episode and writes it to a PNG file. Missing directories are created.
+        """
+        self.save_png(path, self.render_episode(track, episode))
+
+    @staticmethod
+    def save_png(path: str, image: np.ndarray) -> None:
+        """
+        Writes an RGB image to a PNG file. Missing directories are created.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not cv2.imwrite(path, image[:, :, ::-1]):  # OpenCV expects BGR
+            raise OSError(f"Could not write image '{path}'")
+
+    @staticmethod
+    def encode_png(image: np.ndarray) -> bytes:
+        """
+        Encodes an RGB image as PNG
+        """
+        success, data = cv2.imencode(".png", image[:, :, ::-1])  # OpenCV expects BGR
+        if not success:
+            raise ValueError("Could not encode image as PNG")
+        return data.tobytes()
@@ -4,21 +4,29 @@ import numpy as np
 
 from .action import Action
 from .car import Car
+from .crash_type import CrashType
 from .state import State
 from .state_with_racetrack import StateWithRacetrack
+from .transition_table import TransitionTable
+
+_NO_CRASH = int(CrashType.NONE)
 
 
 class Game:
-    def __init__(self, racetrack: np.ndarray, random_state: None | int = None):
+    def __init__(self, racetrack: np.ndarray, random_state: None | int = None,
+                 transition_table: TransitionTable | None = None):
         """
         Capsules all the game logic.
         Mainly contains the racetrack and car.
 
         :param racetrack: the racetrack on which the game should be played
         :param random_state: Used for generating the randomness of the racetrack. Pass an int for reproducible output across multiple function calls
+        :param transition_table: Optional precomputed transitions of the racetrack (see `TransitionTable.for_racetrack`). If given, steps are looked up instead of simulated, with identical results.
         """
         self.rnd = Random(random_state)
         self.racetrack = racetrack
+        self.transition_table = transition_table
+        self.state: State | None = None  # last state returned by get_state
         self.reset()
 
     def reset(self) -> None:
@@ -27,11 +35,22 @@ class Game:
         """
         self.car = Car(self.rnd.choice(self.__get_start_cells()), (0, 0))
         self.n_steps = 0
+        self.__crash_code = _NO_CRASH  # reason of the reset in the last step as int, see `last_crash`
+
+    @property
+    def last_crash(self) -> CrashType:
+        """
+        Reason why the car has been reset to the start line in the last step.
+        Stored as an int and only converted when requested, since steps have to be fast.
+        """
+        return CrashType(self.__crash_code)
 
     def is_finished(self) -> bool:
         """
         Returns if the game is finished. This means that the car reached the finish line.
         """
+        if self.transition_table is not None:
+            return self.car.pos in self.transition_table.end_cells
         return self.car.pos in self.__get_end_cells()
 
     def get_n_steps(self) -> int:
@@ -46,7 +65,10 @@ class Game:
 
         :return: Current state
         """
-        return State(self.car.pos, self.car.vel)
+        # position and velocity are replaced (not modified) when the car moves, thus the last state can be reused if they are the same objects
+        if self.state is None or self.state.agent_position is not self.car.pos or self.state.agent_velocity is not self.car.vel:
+            self.state = State(self.car.pos, self.car.vel)
+        return self.state
 
     def get_state_with_racetrack(self) -> StateWithRacetrack:
         """
@@ -78,6 +100,9 @@ class Game:
 
         self.n_steps += 1
 
+        if self.transition_table is not None and action.x in (-1, 0, 1) and action.y in (-1, 0, 1):
+            return self.__lookup_step(action)
+
         # apply velocity change & update position
         self.__update_velocity((action.x, action.y))
         has_been_reset = self.__update_position()
@@ -85,6 +110,31 @@ class Game:
         # return reward
         return -5 if has_been_reset else -1
 
+    def __lookup_step(self, action: Action) -> int:
+        """
+        Applies the specified action by looking up its outcome in the transition table.
+
+        :param action: indicates how the velocity should be changed
+        :return: returns a reward
+        """
+        table = self.transition_table
+        pos = self.car.pos
+        vel = self.car.vel
+        n_cols = table.shape[1]
+        state_index = table.encode_state(n_cols, pos[0], pos[1], vel[0], vel[1])
+        next_state_index = int(table.next_state[state_index, action.index])
+
+        if next_state_index == TransitionTable.RESET:
+            self.car.reset_velocity()
+            self.car.pos = self.rnd.choice(table.start_cells)
+            self.__crash_code = int(table.crash_type[state_index, action.index])
+        else:
+            row, col, vx, vy = table.decode_state_index(n_cols, next_state_index)
+            self.car.pos = (row, col)
+            self.car.vel = (vx, vy)
+            self.__crash_code = _NO_CRASH
+        return int(table.reward[state_index, action.index])
+
     def __update_position(self) -> bool:
         """
         Updates the position of the car by adding the current velocity.
@@ -95,8 +145,10 @@ class Game:
         (2) the car is outside the track
         (3) the car would be outside the map
 
-        :return: Returns True if the cars position has been reset or not.
+        :return: Returns True if the cars position has been reset or not. The reason is stored in `last_crash`.
         """
+        self.__crash_code = _NO_CRASH
+
         new_pos = (self.car.pos[0] + self.car.vel[0],
                    self.car.pos[1] + self.car.vel[1])
 
@@ -123,16 +175,23 @@ class Game:
         # reset car, if out of bounds & not at finish-line
         if out_of_bound and self.racetrack[new_pos[0]][new_pos[1]] != 3:
             self.car = Car(self.rnd.choice(self.__get_start_cells()), (0, 0))
+            self.__crash_code = CrashType.OUT_OF_BOUNDS
             return True
 
         # reset if it cuts corners
+        # the line includes the new position in most cases, thus also check if it stops outside the track
         if self.__check_intersect(self.car.pos, new_pos):
             self.car.reset_velocity()
             self.car.pos = self.rnd.choice(self.__get_start_cells())
+            if self.racetrack[new_pos[0]][new_pos[1]] == 0:
+                self.__crash_code = CrashType.OFF_TRACK
+            else:
+                self.__crash_code = CrashType.CORNER_CUT
             return True
 
         # checking if it is on an invalid cell
         if self.racetrack[new_pos[0]][new_pos[1]] == 0:
+            self.__crash_code = CrashType.OFF_TRACK
             self.car.reset_velocity()
             self.car.pos = self.rnd.choice(self.__get_start_cells())
             return True
@@ -227,6 +286,8 @@ class Game:
 
         :return: Returns end cells as tuples
         """
+        if self.transition_table is not None:
+            return self.transition_table.start_cells
         return [tuple(coord) for coord in np.argwhere(self.racetrack == 2).tolist()]
 
     def __get_end_cells(self) -> list[tuple[int, int]]:
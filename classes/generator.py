@@ -42,9 +42,6 @@ class Generator:
         :return: Returns a 2d numpy array, where each element represents a cell of the racetrack. The first dimension is the row, the second is the colum.
         """
 
-        def dis(p1, p2):
-            return np.sqrt((p1[0] - p2[0]) ** 2 + (p1[1] - p2[1]) ** 2)
-
         size_of_land = size
         land = np.zeros((size_of_land, size_of_land), np.uint8)
         mask = np.zeros((size_of_land, size_of_land), np.uint8)  # used later to make start-cell to whole start-line
@@ -88,27 +85,19 @@ class Generator:
         # find paths to connect the points together (incl start and end)
         tmp_start = start
         tmp_end = end
-        id_min_dis = []
         short_lines = []
         end_point_1 = []
         end_point_2 = []
         for j in range(number_of_points):  # number of edge
-            min_dis = np.sqrt(size_of_land ** 2 * 2) + 10
-            if_start = True  # or end = false
-            for i in range(len(rand_points)):  # number of short lines
-                # find nearest point to the previous poit, begin with start
-                dis_to_tmp_start = dis(tmp_start, rand_points[i])
-                dis_to_tmp_end = dis(tmp_end, rand_points[i])
-
-                if dis_to_tmp_start < dis_to_tmp_end and dis_to_tmp_start < min_dis:
-                    if_start = True
-                    min_dis = dis_to_tmp_start
-                    id_min_dis = i
-                else:
-                    if dis_to_tmp_end < min_dis:
-                        if_start = False
-                        min_dis = dis_to_tmp_end
-                        id_min_dis = i
+            # find nearest point to the previous points (begin with start & end), for all remaining points at once
+            # a point belongs to the start, if it is strictly closer to it than to the end
+            # on equal distances the first point is chosen
+            points = np.array(rand_points)
+            dis_to_tmp_start = np.sqrt(((points - tmp_start) ** 2).sum(axis=1))
+            dis_to_tmp_end = np.sqrt(((points - tmp_end) ** 2).sum(axis=1))
+            dis_to_nearest = np.where(dis_to_tmp_start < dis_to_tmp_end, dis_to_tmp_start, dis_to_tmp_end)
+            id_min_dis = int(np.argmin(dis_to_nearest))
+            if_start = bool(dis_to_tmp_start[id_min_dis] < dis_to_tmp_end[id_min_dis])
 
             if if_start:
                 short_lines.append([tmp_start, rand_points[id_min_dis]])
@@ -137,19 +126,16 @@ class Generator:
 
         # make start and end cell to a start-line adn finish-line
         mask = mask * img_dilation
+        # the points are (x, y), thus the label of a point is at [y, x]
+        # label 0 is the background, i.e. the point is not on the mask
         labeled = cv2.connectedComponents(mask)
-        start_id = []
-        end_id = []
-        for i in range(1, labeled[0]):
-            indexes = np.where(labeled[1] == i)
-            for j in range(len(indexes[0])):
-                if indexes[0][j] == start[1] and indexes[1][j] == start[0]:
-                    start_id = i
-                if indexes[0][j] == end[1] and indexes[1][j] == end[0]:
-                    end_id = i
+        start_id = labeled[1][start[1], start[0]]
+        end_id = labeled[1][end[1], end[0]]
 
         race_field = img_dilation.astype('int8')
-        race_field[np.where(labeled[1] == start_id)] = 2
-        race_field[np.where(labeled[1] == end_id)] = 3
+        if start_id != 0:
+            race_field[labeled[1] == start_id] = 2
+        if end_id != 0:
+            race_field[labeled[1] == end_id] = 3
 
         return race_field.astype(np.float64)
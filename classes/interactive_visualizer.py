@@ -1,11 +1,13 @@
-import copy
+import base64
+import queue
 import threading
 from functools import partial
 from tkinter import *
-from typing import Any
 
+import cv2.cv2 as cv2
 import numpy as np
 
+from .episode_renderer import EpisodeRenderer
 from .state_with_racetrack import StateWithRacetrack
 
 
@@ -13,116 +15,94 @@ class InteractiveVisualizer:
     """
     Visualizing a game as a dynamic image.
     If the state of the game changes the visualization also changes dynamically.
+
+    Positions are passed to the window through a thread-safe queue, and are shown one after another with the given speed.
+    Thus the game does not have to wait for the window, and can run at full speed.
     """
 
-    def __init__(self, state: StateWithRacetrack, title: str):
-        self.state = copy.deepcopy(state)
-        t = threading.Thread(target=partial(self._run_in_thread, self.state, title))
+    def __init__(self, state: StateWithRacetrack, title: str, steps_per_second: float = 2.0, fps: float = 30.0):
+        """
+        :param state: initial state of the game
+        :param title: title of the window
+        :param steps_per_second: how many positions are shown per second
+        :param fps: how many times per second the window is redrawn. If there are more steps per second than frames, only the last position of each frame is drawn.
+        """
+        self.positions: queue.Queue[tuple[int, int]] = queue.Queue()
+        t = threading.Thread(target=partial(self._run_in_thread, state.racetrack, state.agent_position, title,
+                                            steps_per_second, fps))
         t.start()
 
     def update_agent(self, new_pos: tuple[int, int]) -> None:
-        self.state.agent_position = new_pos
+        self.positions.put(new_pos)
 
-    def _run_in_thread(self, state: StateWithRacetrack, title: str) -> None:
-        InteractiveVisualizerIntern(state, title)
+    def _run_in_thread(self, racetrack: np.ndarray, position: tuple[int, int], title: str, steps_per_second: float,
+                       fps: float) -> None:
+        InteractiveVisualizerIntern(racetrack, position, self.positions, title, steps_per_second, fps)
 
 
 class InteractiveVisualizerIntern:
-    def __init__(self, state: StateWithRacetrack, title: str, boardsize: int = 600):
-        self.state = state
-        self.old_state = copy.deepcopy(state)
-        self.back_up_map = copy.deepcopy(state.racetrack)
+    def __init__(self, racetrack: np.ndarray, position: tuple[int, int], positions: queue.Queue, title: str,
+                 steps_per_second: float, fps: float, boardsize: int = 600):
+        self.racetrack = racetrack
+        self.positions = positions
+        self.steps_per_frame = steps_per_second / fps
+        self.frame_interval = max(1, round(1000 / fps))  # in ms
+        self.pending_steps = 0.0  # steps that are due, but have not been shown yet
 
         # initiate the gameboard
         self.init_board(boardsize, title)
+        self.move_agent(position)
 
         # start the event loop that checks for position changes
-        self.window.after(0, self.check_for_state_change)
+        self.window.after(self.frame_interval, self.check_for_state_change)
 
         # start blocking main loop
         self.window.mainloop()
 
     def init_board(self, boardsize: int, title: str) -> None:
         """
-        Creates the tkinter window and initializes it with the correct state.
+        Creates the tkinter window and initializes it with the racetrack as a single image, and the car as a rectangle.
 
         :param boardsize: The size of the wanted board.
         """
+        image = EpisodeRenderer().render(self.racetrack, cell_size=max(1, boardsize // max(self.racetrack.shape)))
+        if max(image.shape[:2]) > boardsize:
+            # racetracks with more cells than pixels are scaled down
+            scale = boardsize / max(image.shape[:2])
+            image = cv2.resize(image, (round(image.shape[1] * scale), round(image.shape[0] * scale)),
+                               interpolation=cv2.INTER_NEAREST)
+        self.cell_size = image.shape[0] / self.racetrack.shape[0]
+
         self.window = Tk()
         self.window.title(title)
-        self.canvas = Canvas(self.window, width=boardsize, height=boardsize)
+        self.canvas = Canvas(self.window, width=image.shape[1], height=image.shape[0])
         self.canvas.pack()
+        self.photo = PhotoImage(master=self.window, data=base64.b64encode(EpisodeRenderer.encode_png(image)))
+        self.canvas.create_image(0, 0, anchor=NW, image=self.photo)
+        self.agent = self.canvas.create_rectangle(0, 0, 0, 0, fill="red", outline="")
 
-        # create grid of rectangles and safe it
-        self.board = self.create_board(self.state.racetrack, boardsize)
-
-        # set initial position of agent
-        self.change_color(self.board[self.state.agent_position[0]][self.state.agent_position[1]], "red")
-
-    def create_board(self, input_array: np.ndarray, boardsize: int) -> np.ndarray:
+    def move_agent(self, position: tuple[int, int]) -> None:
         """
-        Converts the initial ndarray-2d array into a grid of rectangles.
-
-        Assumption: the input array has the structure NxN
-
-        :param input_array: Initial racecourse
-        :param boardsize: size of the displayed board. This is needed so the rectangles have the proper size.
+        Moves the car to a position. Only the rectangle of the car is redrawn, not the racetrack.
         """
-        for i in range(input_array.shape[0]):
-            for j in range(input_array.shape[1]):
-                cell_size = boardsize / input_array.shape[0]
-                color = self.get_color(input_array[i][j])
-                x1 = j * cell_size
-                y1 = (input_array.shape[0] - 1) * cell_size - i * cell_size
-                x2 = x1 + cell_size
-                y2 = y1 + cell_size
-                input_array[i][j] = self.canvas.create_rectangle(x1, y1, x2, y2, fill=color)
-        return input_array
-
-    def get_color(self, num: int) -> str:
-        """
-        Returns color corresponding to the cell type.
-
-        :param num: integer that represents the cell type.
-        """
-        if num == 0:
-            return "white"
-        elif num == 1:
-            return "black"
-        elif num == 2:
-            return "yellow"
-        else:
-            return "green"
-
-    def change_color(self, item: Any, color: str) -> None:
-        """
-        Changes the color of a specific rectangle in the grid.
-
-        :param item: The rectangle, which color should be changed.
-        """
-        self.canvas.itemconfig(int(item), fill=color)
-
-    def update_agent(self) -> None:
-        """
-        Updates the rectangles with the correct colors
-        """
-
-        # reset color of old position
-        old_color = self.get_color(self.back_up_map[self.old_state.agent_position[0]][self.old_state.agent_position[1]])
-        self.change_color(self.board[self.old_state.agent_position[0]][self.old_state.agent_position[1]], old_color)
-
-        # color new position correct
-        self.change_color(self.board[self.state.agent_position[0]][self.state.agent_position[1]], "red")
+        # the first row is drawn at the bottom
+        x1 = position[1] * self.cell_size
+        y1 = (self.racetrack.shape[0] - 1 - position[0]) * self.cell_size
+        self.canvas.coords(self.agent, x1, y1, x1 + self.cell_size, y1 + self.cell_size)
 
     def check_for_state_change(self) -> None:
         """
-        Checks if the position of the car changed and adjusts the coloring of the rectangles if it is necessary.
+        Shows the positions that are due in this frame, and moves the car to the last of them.
         After that it puts itself in the event loop again.
         """
-        if self.state.agent_position == self.old_state.agent_position:
-            pass
-        else:
-            self.update_agent()
-            self.old_state.agent_position = copy.deepcopy(self.state.agent_position)
-        self.window.update()
-        self.window.after(0, self.check_for_state_change)
+        self.pending_steps = min(self.pending_steps + self.steps_per_frame, max(1.0, self.steps_per_frame))
+        position = None
+        while self.pending_steps >= 1:
+            try:
+                position = self.positions.get_nowait()
+            except queue.Empty:
+                break
+            self.pending_steps -= 1
+        if position is not None:
+            self.move_agent(position)
+        self.window.after(self.frame_interval, self.check_for_state_change)
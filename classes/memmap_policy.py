@@ -0,0 +1,100 @@
+from random import Random
+
+import numpy as np
+
+from .action import Action
+from .agent import Agent
+from .array_agent import ArrayAgent
+from .base_agent import BaseAgent
+from .state import State
+from .tiled_agent import TiledAgent
+from .transition_table import TransitionTable
+
+
+class MemmapPolicy:
+    def __init__(self, path: str, random_state: int | None):
+        """
+        Read-only greedy policy of a trained agent, backed by memory-mapped files.
+        All processes that open the same files share one physical copy of the expected returns and the best actions.
+        When pickled (e.g. to send it to a worker process), only the path and the random generator are transferred.
+
+        :param path: file created with `MemmapPolicy.export`
+        :param random_state: Used for breaking ties between equally good actions. Pass an int for reproducible output across multiple function calls
+        """
+        self.path = path
+        self.rnd = Random(random_state)
+        self.q = np.load(path, mmap_mode="r")
+        # best actions of each state (as mask with one bit per action, see `BaseAgent.TIED_ACTION_INDICES`),
+        # indexed by state index (see `TransitionTable`). Viewed as plain array, since indexing a memmap is slow.
+        self.best_action_masks = np.load(self.masks_path(path), mmap_mode="r").view(np.ndarray)
+        self.action_space = [Action(x, y) for y in (-1, 0, 1) for x in (-1, 0, 1)]
+
+    @staticmethod
+    def masks_path(path: str) -> str:
+        """
+        Returns the path of the best actions that belong to the expected returns at `path`
+        """
+        return path[:-len(".npy")] + ".masks.npy" if path.endswith(".npy") else path + ".masks.npy"
+
+    @staticmethod
+    def export(agent: Agent | ArrayAgent | TiledAgent, path: str, racetrack_shape: tuple[int, int] | None = None) -> None:
+        """
+        Writes the expected returns of an agent to a file, that can be opened with `MemmapPolicy`.
+        The best actions of all states are computed once and written next to it (see `masks_path`).
+
+        :param agent: the trained agent, either an `Agent`, an `ArrayAgent` or a `TiledAgent`
+        :param path: file to write to, should end with ".npy"
+        :param racetrack_shape: shape of the racetrack the agent is trained on. Only needed for an `Agent`.
+        """
+        masks = None
+        if isinstance(agent, ArrayAgent):
+            q = agent.q
+            masks = agent.best_action_masks  # kept up to date by the agent
+        elif isinstance(agent, TiledAgent):
+            q = agent.q.to_dense()
+        elif isinstance(agent, Agent):
+            q = np.zeros((racetrack_shape[0], racetrack_shape[1], 9, 9, len(agent.action_space)))
+            for (state, action), value in agent.q.items():
+                q[ArrayAgent.state_index(state) + (action.index,)] = value
+        else:
+            raise TypeError(f"policies of a {type(agent).__name__} cannot be exported")
+        if masks is None:
+            expected_returns = q.reshape(-1, q.shape[-1])
+            is_best = expected_returns == expected_returns.max(axis=1, keepdims=True)
+            masks = (is_best @ (1 << np.arange(q.shape[-1]))).astype(np.int16)
+        np.save(MemmapPolicy.masks_path(path), masks)
+        np.save(path, q)
+
+    def __getstate__(self):
+        return {"path": self.path, "rnd": self.rnd}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], None)
+        self.rnd = state["rnd"]
+
+    def determine_epsilon_action(self, state: State, epsilon: float) -> Action:
+        """
+        Returns the best action with probability 1-epsilon, otherwise a random action.
+        """
+        if self.rnd.random() < 1 - epsilon:
+            return self.determine_best_action(state)
+        else:
+            return self.determine_rnd_action()
+
+    def determine_rnd_action(self) -> Action:
+        """
+        Returns a random action
+        """
+        return self.rnd.choice(self.action_space)
+
+    def determine_best_action(self, state: State) -> Action:
+        """
+        Returns the best action for a given state.
+        Ties between equally good actions are broken randomly.
+        """
+        position = state.agent_position
+        velocity = state.agent_velocity
+        state_index = TransitionTable.encode_state(self.q.shape[1], position[0], position[1], velocity[0], velocity[1])
+        best_action_indices = BaseAgent.TIED_ACTION_INDICES[self.best_action_masks[state_index]]
+        best_action_index = self.rnd.choice(best_action_indices)
+        return self.action_space[best_action_index]
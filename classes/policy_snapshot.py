@@ -0,0 +1,53 @@
+from random import Random
+from typing import TYPE_CHECKING, Hashable
+
+import numpy as np
+
+from .action import Action
+from .state import State
+
+if TYPE_CHECKING:
+    from .base_agent import BaseAgent
+
+
+class PolicySnapshot:
+    def __init__(self, agent: "BaseAgent"):
+        """
+        Read-only greedy policy of an agent, frozen at the time of its creation (see `BaseAgent.snapshot`).
+
+        Creating a snapshot does not copy the expected returns (copy-on-write).
+        Instead, the agent saves the old expected returns of a state into the journal of every living snapshot,
+        right before it changes them for the first time. Thus a snapshot costs time and memory proportional
+        to the number of states that changed since it was created, not to the size of the Q-table.
+
+        Plays exactly like a deep copy of the agent at the time of its creation.
+
+        :param agent: the agent to take the snapshot of
+        """
+        self.agent = agent
+        self.action_space = agent.action_space
+        self.journal: dict[Hashable, np.ndarray] = {}  # state key -> expected returns at the time of the snapshot
+
+        # the random generator is copied, so that the agent and the snapshot do not influence each other
+        self.rnd = Random()
+        self.rnd.setstate(agent.rnd.getstate())
+
+    def get_expected_returns(self, state: State) -> np.ndarray:
+        """
+        Returns the expected return of each action in a state, at the time of the snapshot
+        """
+        key = self.agent._state_key(state)
+        # the live values are read before the journal: the agent journals before it writes,
+        # thus if the journal has no entry afterwards, the live values have not been changed yet
+        expected_returns = self.agent._state_values(key)
+        return self.journal.get(key, expected_returns)
+
+    def determine_best_action(self, state: State) -> Action:
+        """
+        Returns the best action for a given state
+        """
+        expected_returns = self.get_expected_returns(state)
+        # select action with the highest expected reward
+        best_action_indices = np.flatnonzero(expected_returns == expected_returns.max())
+        best_action_index = self.rnd.choice(best_action_indices)
+        return self.action_space[best_action_index]
@@ -0,0 +1,84 @@
+import numpy as np
+
+from .action import Action
+from .array_agent import ArrayAgent
+from .state import State
+
+
+class QLearningAgent(ArrayAgent):
+    def __init__(self, random_state: int | None, racetrack_shape: tuple[int, int], gamma: float = 0.9,
+                 alpha: float = 0.5, initial_q: float | None = None, trace_decay: float = 0.8,
+                 trace_length: int = 20):
+        """
+        Agent using Reinforcement Learning with Q-Learning and Temporal Difference Learning.
+        Learns after every single step, instead of after a whole episode.
+
+        Each step only bootstraps from the expected return of the next state, thus a reward would need as many episodes
+        as steps to reach the start of the track. Therefore, the error of a step is also applied to the last steps of
+        the episode (eligibility traces of Watkins's Q(lambda)), with a weight decaying by `gamma * trace_decay` per step.
+        The trace is cut after a random action, since the following steps do not show the return of the greedy policy.
+
+        By default, the expected returns start pessimistic at the return of never reaching the finish line (-1 / (1 - gamma)),
+        so that actions not tried yet do not look better than known ones, which would explore every state before finishing once.
+
+        :param random_state: Used for generating the randomness of the agent. Pass an int for reproducible output across multiple function calls
+        :param racetrack_shape: shape of the racetrack the agent is trained on
+        :param gamma: discount factor of future rewards
+        :param alpha: learning rate, i.e. how far the expected return moves towards each new estimate
+        :param initial_q: expected return of the state-action-pairs before they have been learned. If `None`, -1 / (1 - gamma) is used.
+        :param trace_decay: decay of the eligibility traces (lambda), 0 only learns the last step
+        :param trace_length: maximal number of steps in the eligibility trace, older steps have a negligible weight
+        """
+        super().__init__(random_state, racetrack_shape, gamma, -1 / (1 - gamma) if initial_q is None else initial_q)
+        self.alpha = alpha
+        self.trace_decay = trace_decay
+        self.trace_length = trace_length
+        # state indices (see `TransitionTable`) & action indices of the last steps of the episode, the newest last
+        self._trace_states: list[int] = []
+        self._trace_actions: list[int] = []
+
+    def update(self, state: State, action: Action, reward: int, next_state: State, finished: bool) -> float:
+        """
+        Learn from a single step
+
+        :param state: state before the step
+        :param action: action that was chosen in the state
+        :param reward: reward of the step
+        :param next_state: state after the step
+        :param finished: if the car reached the finish line with this step
+        :return: absolute change of the expected return of the state-action-pair
+        """
+        target = reward
+        if not finished:
+            target += self.gamma * self.best_values[self._state_key(next_state)]
+
+        state_index = self._state_key(state)
+        if not (int(self.best_action_masks[state_index]) >> action.index) & 1:
+            self.end_episode()  # random action, see `__init__`
+        self._trace_states.append(state_index)
+        self._trace_actions.append(action.index)
+        if len(self._trace_states) > self.trace_length:
+            del self._trace_states[0]
+            del self._trace_actions[0]
+        if self._snapshots:
+            self._journal(self._trace_states)
+
+        q = self.q.reshape(-1, len(self.action_space))
+        change = self.alpha * (target - q[state_index, action.index])
+        n = len(self._trace_states)
+        weights = (self.gamma * self.trace_decay) ** np.arange(n - 1, -1, -1)
+        trace_states = np.array(self._trace_states)
+        np.add.at(q, (trace_states, np.array(self._trace_actions)), change * weights)
+        self.q_counts[self.state_index(state) + (action.index,)] += 1
+        self._update_best_actions(trace_states)
+
+        if finished:
+            self.end_episode()
+        return abs(float(change))
+
+    def end_episode(self) -> None:
+        """
+        Clears the eligibility trace, has to be called after an episode that ended without reaching the finish line
+        """
+        self._trace_states.clear()
+        self._trace_actions.clear()
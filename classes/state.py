@@ -1,18 +1,36 @@
 class State:
+    __slots__ = ("_agent_position", "_agent_velocity", "key")
+
     def __init__(self, agent_position: tuple[int, int], agent_velocity: tuple[int, int]):
-        self.agent_position = agent_position
-        self.agent_velocity = agent_velocity
+        """
+        Position and velocity of the car. States are immutable.
+
+        Position and velocity are packed into a single integer `key`, that is used for hashing and comparing states.
+        The key is unique for positions in [0, 65535] and velocities in [-8, 7], which covers all states of the game.
+        """
+        self._agent_position = agent_position
+        self._agent_velocity = agent_velocity
+        self.key = ((agent_position[0] * 65536 + agent_position[1]) * 16 + agent_velocity[0] + 8) * 16 \
+            + agent_velocity[1] + 8
+
+    @property
+    def agent_position(self) -> tuple[int, int]:
+        return self._agent_position
+
+    @property
+    def agent_velocity(self) -> tuple[int, int]:
+        return self._agent_velocity
 
     def __eq__(self, other):
         if isinstance(other, State):
-            return self.agent_position == other.agent_position and self.agent_velocity == other.agent_velocity
+            return self.key == other.key
         return NotImplemented
 
     def __repr__(self):
         return f"State(pos:{self.agent_position}, vel:{self.agent_velocity})"
 
     def __hash__(self):
-        return hash((self.agent_position, self.agent_velocity))
+        return self.key
 
     def __lt__(self, other):
         if self.agent_position < other.agent_position:
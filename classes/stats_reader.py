@@ -0,0 +1,66 @@
+import os
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from .stats_writer import StatsWriter
+
+
+class StatsReader:
+    def __init__(self, directory: str, mmap: bool = True):
+        """
+        Reads the statistics written by a `StatsWriter`, also while it is still writing.
+        Only the chunks that have been completely written are read.
+
+        :param directory: directory of the chunks
+        :param mmap: if the columns should be memory-mapped instead of loaded into memory
+        """
+        self.directory = directory
+        self.mmap_mode = "r" if mmap else None
+        self.chunks = StatsWriter.list_chunks(directory)
+        # the columns of `StatsWriter.COLUMNS` come first in their order, other columns are sorted by name
+        order = list(StatsWriter.COLUMNS)
+        names = [] if len(self.chunks) == 0 else [name[:-len(".npy")] for name in os.listdir(self.chunks[0])]
+        self.columns = sorted(names, key=lambda name: (order.index(name) if name in order else len(order), name))
+
+    def __len__(self) -> int:
+        """
+        Number of rows of all chunks
+        """
+        if len(self.chunks) == 0:
+            return 0
+        return sum(len(self.__load(chunk, self.columns[0])) for chunk in self.chunks)
+
+    def iter_chunks(self, columns: list[str] | None = None) -> Iterator[dict[str, np.ndarray]]:
+        """
+        Yields the chunks one after another, so that statistics larger than the memory can be processed.
+
+        :param columns: names of the columns to read. If `None`, all columns are read.
+        :return: column name -> values of the rows of the chunk
+        """
+        columns = columns if columns is not None else self.columns
+        for chunk in self.chunks:
+            yield {column: self.__load(chunk, column) for column in columns}
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Returns the values of all rows of a column
+        """
+        values = [self.__load(chunk, name) for chunk in self.chunks]
+        return np.concatenate(values) if len(values) > 0 else np.zeros(0)
+
+    def to_dataframe(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        Returns the statistics as a dataframe. Only the given columns are loaded into memory.
+
+        :param columns: names of the columns to load. If `None`, all columns are loaded.
+        """
+        columns = columns if columns is not None else self.columns
+        return pd.DataFrame({column: self.column(column) for column in columns})
+
+    def __load(self, chunk: str, column: str) -> np.ndarray:
+        """
+        Returns the values of a column of a chunk
+        """
+        return np.load(os.path.join(chunk, column + ".npy"), mmap_mode=self.mmap_mode)
@@ -0,0 +1,85 @@
+import os
+import shutil
+
+import numpy as np
+
+
+class StatsWriter:
+    # statistics per game, with the same columns as in `agent_analysis.ipynb`
+    COLUMNS = {"n_model": np.int32, "n_games": np.int32, "n_steps": np.int32, "reward": np.int32}
+
+    def __init__(self, directory: str, columns: dict[str, type] | None = None, chunk_size: int = 65536):
+        """
+        Appends statistics of games to a directory on disk, in chunks of a fixed number of rows.
+        Rows are buffered in preallocated arrays until a chunk is full, thus the memory stays constant regardless of the length of the training.
+
+        Every chunk is a directory with one npy file per column, which can be memory-mapped (see `StatsReader`).
+        It is written under a temporary name first, so that a crash only loses the rows of the current chunk.
+        If the directory already contains chunks, new chunks are added after them.
+
+        :param directory: directory of the chunks, created if it does not exist
+        :param columns: name and dtype of each column. If `None`, the columns of `agent_analysis.ipynb` are used (see `COLUMNS`).
+        :param chunk_size: number of rows per chunk
+        """
+        self.directory = directory
+        self.columns = dict(columns if columns is not None else self.COLUMNS)
+        self.chunk_size = chunk_size
+        os.makedirs(directory, exist_ok=True)
+
+        chunks = self.list_chunks(directory)
+        if len(chunks) > 0:
+            existing_columns = sorted(name[:-len(".npy")] for name in os.listdir(chunks[-1]))
+            if existing_columns != sorted(self.columns):
+                raise ValueError(f"'{directory}' contains statistics with the columns {existing_columns}")
+        self.n_chunks = len(chunks)
+
+        self.buffers = {name: np.zeros(chunk_size, dtype=dtype) for name, dtype in self.columns.items()}
+        self.columns_in_order = list(self.buffers.values())
+        self.n_rows = 0  # rows in the buffers
+
+    @staticmethod
+    def list_chunks(directory: str) -> list[str]:
+        """
+        Returns the paths of all completely written chunks of a directory, in the order they were written
+        """
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.startswith("chunk-")]
+
+    def append(self, *values) -> None:
+        """
+        Appends a row. The values are given in the order of the columns.
+        """
+        for buffer, value in zip(self.columns_in_order, values):
+            buffer[self.n_rows] = value
+        self.n_rows += 1
+        if self.n_rows == self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the buffered rows as a chunk, even if it is not full
+        """
+        if self.n_rows == 0:
+            return
+        name = f"chunk-{self.n_chunks:06d}"
+        tmp_path = os.path.join(self.directory, f".{name}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for column, buffer in self.buffers.items():
+            np.save(os.path.join(tmp_path, column + ".npy"), buffer[:self.n_rows])
+        os.replace(tmp_path, os.path.join(self.directory, name))
+        self.n_chunks += 1
+        self.n_rows = 0
+
+    def close(self) -> None:
+        """
+        Writes the remaining rows. Has to be called at the end of the training.
+        """
+        self.flush()
+
+    def __enter__(self) -> "StatsWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
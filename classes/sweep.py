@@ -0,0 +1,183 @@
+import hashlib
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from random import Random
+
+import numpy as np
+import pandas as pd
+
+from .dense_agent import DenseAgent
+from .episode_buffer import EpisodeBuffer
+from .game import Game
+from .track_store import TrackStore
+from .transition_table import TransitionTable
+from .utils import get_track
+
+
+class SweepConfig:
+    def __init__(self, track_number: int | None, track_random_seed: int | None, gamma: float, epsilon: float,
+                 seed: int, n_episodes: int):
+        """
+        Configuration of a single training run of a sweep.
+
+        :param track_number: Number of the racetrack on the predefined tracklist
+        :param track_random_seed: seed for the racetrack generator
+        :param gamma: discount factor of the agent
+        :param epsilon: probability of a random action during training
+        :param seed: number of the model. The random state of the agent and game is derived from it (see `derive_random_state`)
+        :param n_episodes: how many episodes to train the agent
+        """
+        self.track_number = track_number
+        self.track_random_seed = track_random_seed
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.seed = seed
+        self.n_episodes = n_episodes
+
+    def __eq__(self, other):
+        if isinstance(other, SweepConfig):
+            return self.__key() == other.__key()
+        return NotImplemented
+
+    def __repr__(self):
+        return f"SweepConfig(track_number:{self.track_number}, track_random_seed:{self.track_random_seed}, " \
+               f"gamma:{self.gamma}, epsilon:{self.epsilon}, seed:{self.seed}, n_episodes:{self.n_episodes})"
+
+    def __hash__(self):
+        return hash(self.__key())
+
+    def __key(self) -> tuple:
+        return self.track_number, self.track_random_seed, self.gamma, self.epsilon, self.seed, self.n_episodes
+
+    def cache_name(self) -> str:
+        """
+        Returns a file name that uniquely identifies the configuration
+        """
+        return hashlib.sha1(repr(self.__key()).encode()).hexdigest() + ".npz"
+
+
+def build_grid(tracks: list[tuple[int | None, int | None]], gammas: list[float], epsilons: list[float],
+               seeds: int | list[int], n_episodes: int) -> list[SweepConfig]:
+    """
+    Builds the cartesian product of all parameters.
+
+    :param tracks: racetracks given as pairs of (track_number, track_random_seed), see `get_track`
+    :param gammas: discount factors of the agent
+    :param epsilons: probabilities of a random action during training
+    :param seeds: numbers of the models, or how many models to train per parameter combination
+    :param n_episodes: how many episodes to train each agent
+    """
+    if isinstance(seeds, int):
+        seeds = list(range(seeds))
+    return [SweepConfig(track[0], track[1], gamma, epsilon, seed, n_episodes)
+            for track, gamma, epsilon, seed in itertools.product(tracks, gammas, epsilons, seeds)]
+
+
+def derive_random_state(seed: int) -> int:
+    """
+    Derives a reproducible random state for the model with the given number.
+    Matches the random states of the models in `agent_analysis.ipynb`.
+    """
+    rnd = Random(42)
+    random_state = 0
+    for _ in range(seed + 1):
+        random_state = rnd.randint(0, 100000000)
+    return random_state
+
+
+def train(config: SweepConfig, track_store_dir: str | None = None) -> tuple[np.ndarray, np.ndarray, float]:
+    """
+    Trains an agent with a given configuration, and collects statistics of its games.
+
+    :param config: configuration to train
+    :param track_store_dir: directory of a `TrackStore` to load generated racetracks from. If `None`, racetracks are generated.
+    :return: number of steps & reward of each episode, and the train time in seconds
+    """
+    track_store = TrackStore(track_store_dir) if track_store_dir is not None else None
+    track = get_track(config.track_number, config.track_random_seed, track_store)
+    random_state = derive_random_state(config.seed)
+    agent = DenseAgent(random_state=random_state, racetrack_shape=track.shape, gamma=config.gamma)
+    game = Game(racetrack=track, random_state=random_state, transition_table=TransitionTable.for_racetrack(track))
+
+    n_steps = np.zeros(config.n_episodes, dtype=np.int32)
+    rewards = np.zeros(config.n_episodes, dtype=np.int32)
+    episode = EpisodeBuffer()
+    start = time.time()
+    for i in range(config.n_episodes):
+        episode.clear()
+        while not game.is_finished() and game.get_n_steps() < 1000:
+            state = game.get_state()
+            action = agent.determine_epsilon_action(state, config.epsilon)
+            reward = game.noisy_step(action)
+            episode.append(state, action, reward)
+        agent.learn(episode)
+        n_steps[i] = game.get_n_steps()
+        rewards[i] = episode.total_reward()
+        game.reset()
+    end = time.time()
+    return n_steps, rewards, end - start
+
+
+def run_sweep(configs: list[SweepConfig], n_workers: int | None = None, cache_dir: str | None = None,
+              track_store_dir: str | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Trains an agent for every configuration in parallel, and collects statistics of their games.
+    Finished runs are cached on disk, so that only missing configurations are trained on later calls.
+
+    :param configs: configurations to train, e.g. created with `build_grid`
+    :param n_workers: number of worker processes. If `None`, all cores are used.
+    :param cache_dir: directory for the cached runs. If `None`, nothing is cached.
+    :param track_store_dir: directory of a `TrackStore` for the generated racetracks. Missing racetracks are generated in parallel before training. If `None`, every run generates its racetrack.
+    :return: statistics per game (with the same columns as in `agent_analysis.ipynb` plus the other parameters), and the train time per run
+    """
+    results: dict[SweepConfig, tuple[np.ndarray, np.ndarray, float]] = {}
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        for config in configs:
+            path = os.path.join(cache_dir, config.cache_name())
+            if os.path.exists(path):
+                with np.load(path) as data:
+                    results[config] = (data["n_steps"], data["reward"], float(data["train_time"]))
+
+    missing = list(dict.fromkeys(config for config in configs if config not in results))
+    if len(missing) > 0:
+        if track_store_dir is not None:
+            seeds = [config.track_random_seed for config in missing if config.track_number is None]
+            TrackStore(track_store_dir).build(seeds, n_workers=n_workers)
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = {executor.submit(train, config, track_store_dir): config for config in missing}
+            for future in as_completed(futures):
+                config = futures[future]
+                results[config] = future.result()
+                if cache_dir is not None:
+                    _save_run(os.path.join(cache_dir, config.cache_name()), *results[config])
+
+    stats = []
+    train_times = []
+    for config in configs:
+        n_steps, rewards, train_time = results[config]
+        df = pd.DataFrame({"n_model": config.seed, "n_games": np.arange(len(n_steps)),
+                           "n_steps": n_steps, "reward": rewards})
+        df["epsilon"] = config.epsilon
+        df["gamma"] = config.gamma
+        df["track_number"] = config.track_number
+        df["track_random_seed"] = config.track_random_seed
+        stats.append(df)
+        train_times.append((config.seed, config.epsilon, config.gamma, config.track_number, config.track_random_seed,
+                            train_time))
+
+    stats = pd.concat(stats, ignore_index=True)
+    train_times = pd.DataFrame(train_times, columns=["n_model", "epsilon", "gamma", "track_number",
+                                                     "track_random_seed", "train_time"])
+    return stats, train_times
+
+
+def _save_run(path: str, n_steps: np.ndarray, rewards: np.ndarray, train_time: float) -> None:
+    """
+    Saves a finished run. The file is written under a temporary name first, so that an interrupted write is never loaded.
+    """
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, n_steps=n_steps, reward=rewards, train_time=train_time)
+    os.replace(tmp_path, path)
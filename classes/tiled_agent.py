@@ -0,0 +1,106 @@
+from typing import Hashable
+
+import numpy as np
+
+from .action import Action
+from .base_agent import BaseAgent
+from .episode_buffer import EpisodeBuffer
+from .state import State
+from .tiled_q_table import TiledQTable
+from .transition_table import TransitionTable
+
+
+class TiledAgent(BaseAgent):
+    def __init__(self, random_state: int | None, racetrack_shape: tuple[int, int], gamma: float = 0.9,
+                 tile_size: int = 8):
+        """
+        Agent that stores the expected returns in tiles of dense arrays, which are only allocated for visited areas
+        of the racetrack (see `TiledQTable`). Intended for large racetracks, where a `DenseAgent` does not fit into memory.
+        Behaves exactly like `Agent` for the same random state.
+
+        :param random_state: Used for generating the randomness of the agent. Pass an int for reproducible output across multiple function calls
+        :param racetrack_shape: shape of the racetrack the agent is trained on
+        :param gamma: discount factor of future rewards
+        :param tile_size: number of cells of a tile in each direction
+        """
+        super().__init__(random_state, gamma)
+        # expected return, count and best actions for given state-action-pair
+        self.q = TiledQTable(racetrack_shape, len(self.action_space), tile_size)
+
+    @property
+    def resident_tiles(self) -> int:
+        """
+        Number of allocated tiles
+        """
+        return self.q.resident_tiles
+
+    @property
+    def resident_bytes(self) -> int:
+        """
+        Number of bytes of all allocated tiles
+        """
+        return self.q.resident_bytes
+
+    def determine_best_action(self, state: State) -> Action:
+        """
+        Returns the best action for a given state.
+        Ties between equally good actions are broken randomly.
+        """
+        mask = self.q.get_best_action_mask(state.agent_position[0], state.agent_position[1],
+                                           state.agent_velocity[0] + 4, state.agent_velocity[1] + 4)
+        best_action_index = self.rnd.choice(self.TIED_ACTION_INDICES[mask])
+        return self.action_space[best_action_index]
+
+    def refresh_best_actions(self) -> None:
+        """
+        Recomputes the cached best actions of all states.
+        Only needed after the expected returns have been changed from outside the agent.
+        """
+        self.q.refresh_best_actions()
+
+    def learn(self, episode: list[tuple[State, Action, int]] | EpisodeBuffer) -> float:
+        """
+        Learn from a given episode
+
+        :return: mean absolute change of the expected returns of the learned state-action-pairs
+        """
+        if not isinstance(episode, EpisodeBuffer):
+            buffer = EpisodeBuffer(max(1, len(episode)))
+            for state, action, reward in episode:
+                buffer.append(state, action, reward)
+            episode = buffer
+
+        # returns are accumulated in the same order as in `Agent.learn`, thus the results are identical
+        rewards = episode.rewards.tolist()
+        returns = np.empty(len(rewards))
+        g = 0
+        for i in range(len(rewards) - 1, -1, -1):
+            g = self.gamma * g + rewards[i]
+            returns[i] = g
+
+        positions = episode.positions.astype(np.int64)
+        velocities = episode.velocities.astype(np.int64) + 4
+        index = (positions[:, 0], positions[:, 1], velocities[:, 0], velocities[:, 1], episode.actions.astype(np.int64))
+        shape = (self.q.shape[0], self.q.shape[1], 9, 9, len(self.action_space))
+        _, first_visits = np.unique(np.ravel_multi_index(index, shape), return_index=True)
+        if self._snapshots:
+            rows, cols, vxs, vys = (i[first_visits] for i in index[:4])
+            self._journal(np.unique(TransitionTable.encode_state(shape[1], rows, cols, vxs - 4, vys - 4)).tolist())
+        total_change = self.q.merge(*(i[first_visits] for i in index), returns[first_visits],
+                                    np.ones(len(first_visits), dtype=np.int64))
+        return total_change / max(1, len(first_visits))
+
+    def _state_key(self, state: State) -> Hashable:
+        """
+        Returns the key of a state in the journals of the snapshots, i.e. its state index (see `TransitionTable`)
+        """
+        position = state.agent_position
+        velocity = state.agent_velocity
+        return TransitionTable.encode_state(self.q.shape[1], position[0], position[1], velocity[0], velocity[1])
+
+    def _state_values(self, key: Hashable) -> np.ndarray:
+        """
+        Returns the current expected return of each action in a state, given by its key (see `_state_key`)
+        """
+        row, col, vx, vy = TransitionTable.decode_state_index(self.q.shape[1], key)
+        return self.q.get_values(row, col, vx + 4, vy + 4).copy()
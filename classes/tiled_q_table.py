@@ -0,0 +1,200 @@
+import numpy as np
+
+
+class TiledQTable:
+    def __init__(self, racetrack_shape: tuple[int, int], n_actions: int = 9, tile_size: int = 8):
+        """
+        Expected returns and visit counts of all state-action-pairs, stored in square tiles of cells.
+        A tile holds dense arrays for all velocities and actions of its cells, and is only allocated when one of its
+        states is written for the first time. Thus the memory scales with the visited area instead of the whole map.
+
+        Values of states in tiles that have never been written are 0, like in `defaultdict(float)`.
+
+        :param racetrack_shape: shape of the racetrack
+        :param n_actions: number of actions of the agent
+        :param tile_size: number of cells of a tile in each direction
+        """
+        self.shape = racetrack_shape
+        self.n_actions = n_actions
+        self.tile_size = tile_size
+        self.n_tile_cols = -(-racetrack_shape[1] // tile_size)
+        self.tile_shape = (tile_size, tile_size, 9, 9, n_actions)
+
+        self.q_tiles: dict[int, np.ndarray] = {}  # tile id -> expected returns of its state-action-pairs
+        self.count_tiles: dict[int, np.ndarray] = {}  # tile id -> visit counts of its state-action-pairs
+        # tile id -> best actions of its states, as mask with one bit per action
+        self.best_action_mask_tiles: dict[int, np.ndarray] = {}
+        self.all_actions_mask = 2 ** n_actions - 1  # best actions of states that have never been written
+        self.__zeros = np.zeros(n_actions)
+        self.__zeros.flags.writeable = False
+
+    def __len__(self) -> int:
+        """
+        Returns the number of state-action-pairs that have been learned
+        """
+        return sum(int(np.count_nonzero(counts)) for counts in self.count_tiles.values())
+
+    @property
+    def resident_tiles(self) -> int:
+        """
+        Number of allocated tiles
+        """
+        return len(self.q_tiles)
+
+    @property
+    def resident_bytes(self) -> int:
+        """
+        Number of bytes of all allocated tiles
+        """
+        return sum(q.nbytes + counts.nbytes + masks.nbytes for q, counts, masks in
+                   zip(self.q_tiles.values(), self.count_tiles.values(), self.best_action_mask_tiles.values()))
+
+    def tile_id(self, row: int, col: int) -> int:
+        """
+        Returns the id of the tile that contains a cell
+        """
+        return (row // self.tile_size) * self.n_tile_cols + col // self.tile_size
+
+    def get_values(self, row: int, col: int, vx: int, vy: int) -> np.ndarray:
+        """
+        Returns the expected returns of all actions in a state. States that have never been written return
+        a read-only array of zeros, without allocating their tile.
+
+        :param vx: velocity in x direction + 4
+        :param vy: velocity in y direction + 4
+        """
+        q = self.q_tiles.get(self.tile_id(row, col))
+        if q is None:
+            return self.__zeros
+        return q[row % self.tile_size, col % self.tile_size, vx, vy]
+
+    def get_best_action_mask(self, row: int, col: int, vx: int, vy: int) -> int:
+        """
+        Returns the best actions of a state, as mask with one bit per action.
+
+        :param vx: velocity in x direction + 4
+        :param vy: velocity in y direction + 4
+        """
+        masks = self.best_action_mask_tiles.get(self.tile_id(row, col))
+        if masks is None:
+            return self.all_actions_mask
+        return masks[row % self.tile_size, col % self.tile_size, vx, vy]
+
+    def get_tile(self, tile_id: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the expected returns and visit counts of a tile, allocating it if it does not exist yet
+        """
+        q = self.q_tiles.get(tile_id)
+        if q is None:
+            q = self.q_tiles[tile_id] = np.zeros(self.tile_shape, dtype=np.float64)
+            self.count_tiles[tile_id] = np.zeros(self.tile_shape, dtype=np.int32)
+            self.best_action_mask_tiles[tile_id] = np.full(self.tile_shape[:4], self.all_actions_mask, dtype=np.int16)
+        return q, self.count_tiles[tile_id]
+
+    def clear(self) -> None:
+        """
+        Removes all tiles, thus all expected returns and visit counts are 0 again
+        """
+        self.q_tiles.clear()
+        self.count_tiles.clear()
+        self.best_action_mask_tiles.clear()
+
+    def nonzero(self) -> tuple[np.ndarray, ...]:
+        """
+        Returns all state-action-pairs that have been visited or have an expected return, as flat arrays.
+
+        :return: row, column, velocity in x direction + 4, velocity in y direction + 4, action index, expected return and visit count of each pair
+        """
+        parts = []
+        for tile_id, q in self.q_tiles.items():
+            q_counts = self.count_tiles[tile_id]
+            index = np.nonzero((q_counts != 0) | (q != 0))
+            tile_row, tile_col = divmod(tile_id, self.n_tile_cols)
+            parts.append((index[0] + tile_row * self.tile_size, index[1] + tile_col * self.tile_size, *index[2:],
+                          q[index], q_counts[index].astype(np.int64)))
+        if len(parts) == 0:
+            return tuple(np.zeros(0, dtype=np.int64) for _ in range(5)) + (np.zeros(0), np.zeros(0, dtype=np.int64))
+        return tuple(np.concatenate(column) for column in zip(*parts))
+
+    def set_values(self, rows: np.ndarray, cols: np.ndarray, vxs: np.ndarray, vys: np.ndarray, actions: np.ndarray,
+                   q: np.ndarray, counts: np.ndarray) -> None:
+        """
+        Overwrites the expected returns and visit counts of unique state-action-pairs, e.g. when loading a checkpoint.
+        The best actions are not updated, see `refresh_best_actions`.
+
+        :param rows: row of the position of each pair
+        :param cols: column of the position of each pair
+        :param vxs: velocity in x direction + 4 of each pair
+        :param vys: velocity in y direction + 4 of each pair
+        :param actions: action index of each pair
+        :param q: expected return of each pair
+        :param counts: visit count of each pair
+        """
+        if len(rows) == 0:
+            return
+        tile_ids = (rows // self.tile_size) * self.n_tile_cols + cols // self.tile_size
+        order = np.argsort(tile_ids, kind="stable")
+        boundaries = np.flatnonzero(np.diff(tile_ids[order])) + 1
+        for group in np.split(order, boundaries):
+            tile_q, tile_counts = self.get_tile(int(tile_ids[group[0]]))
+            index = (rows[group] % self.tile_size, cols[group] % self.tile_size, vxs[group], vys[group], actions[group])
+            tile_q[index] = q[group]
+            tile_counts[index] = counts[group]
+
+    def to_dense(self) -> np.ndarray:
+        """
+        Returns the expected returns of all state-action-pairs as one dense array,
+        with the dimensions (row, col, vx + 4, vy + 4, action index) like `DenseAgent.q`
+        """
+        q = np.zeros((self.shape[0], self.shape[1], 9, 9, self.n_actions), dtype=np.float64)
+        for tile_id, tile_q in self.q_tiles.items():
+            tile_row, tile_col = divmod(tile_id, self.n_tile_cols)
+            part = q[tile_row * self.tile_size:(tile_row + 1) * self.tile_size,
+                     tile_col * self.tile_size:(tile_col + 1) * self.tile_size]
+            part[...] = tile_q[:part.shape[0], :part.shape[1]]  # tiles at the border reach beyond the racetrack
+        return q
+
+    def merge(self, rows: np.ndarray, cols: np.ndarray, vxs: np.ndarray, vys: np.ndarray, actions: np.ndarray,
+              sums: np.ndarray, counts: np.ndarray) -> float:
+        """
+        Merges the summed returns of unique state-action-pairs into their running means.
+
+        :param rows: row of the position of each pair
+        :param cols: column of the position of each pair
+        :param vxs: velocity in x direction + 4 of each pair
+        :param vys: velocity in y direction + 4 of each pair
+        :param actions: action index of each pair
+        :param sums: sum of the returns of each pair
+        :param counts: number of returns of each pair
+        :return: sum of the absolute changes of the expected returns of the pairs
+        """
+        total_change = 0.0
+        if len(rows) == 0:
+            return total_change
+        tile_ids = (rows // self.tile_size) * self.n_tile_cols + cols // self.tile_size
+        order = np.argsort(tile_ids, kind="stable")
+        boundaries = np.flatnonzero(np.diff(tile_ids[order])) + 1
+        for group in np.split(order, boundaries):
+            q, q_counts = self.get_tile(int(tile_ids[group[0]]))
+            index = (rows[group] % self.tile_size, cols[group] % self.tile_size, vxs[group], vys[group], actions[group])
+            n = q_counts[index]
+            old_q = q[index]
+            new_q = (old_q * n + sums[group]) / (n + counts[group])
+            q[index] = new_q
+            q_counts[index] = n + counts[group]
+            total_change += float(np.abs(new_q - old_q).sum())
+
+            # update the best actions of the changed states
+            state_index = index[:4]
+            expected_returns = q[state_index]
+            is_best = expected_returns == expected_returns.max(axis=1)[:, None]
+            self.best_action_mask_tiles[int(tile_ids[group[0]])][state_index] = is_best @ (1 << np.arange(self.n_actions))
+        return total_change
+
+    def refresh_best_actions(self) -> None:
+        """
+        Recomputes the best actions of all states
+        """
+        for tile_id, q in self.q_tiles.items():
+            is_best = q == q.max(axis=-1, keepdims=True)
+            self.best_action_mask_tiles[tile_id][...] = is_best @ (1 << np.arange(self.n_actions))
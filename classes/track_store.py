@@ -0,0 +1,103 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .generator import Generator
+
+
+class TrackStore:
+    def __init__(self, directory: str):
+        """
+        On-disk cache of generated racetracks, so that every racetrack is only generated once.
+        Each racetrack is identified by (seed, size, n_edges, kernel_size) and stored in its own file.
+        The cells are packed with 2 bits each, thus a racetrack of size 50 takes 625 bytes (plus the npy header).
+
+        :param directory: directory of the stored racetracks, created if it does not exist
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, seed: int, size: int = 50, n_edges: int = 4, kernel_size: int = 7) -> str:
+        """
+        Returns the file of a racetrack
+        """
+        return os.path.join(self.directory, f"tr-{seed}-{size}-{n_edges}-{kernel_size}.npy")
+
+    def contains(self, seed: int, size: int = 50, n_edges: int = 4, kernel_size: int = 7) -> bool:
+        """
+        Returns if a racetrack has already been generated
+        """
+        return os.path.exists(self.path(seed, size, n_edges, kernel_size))
+
+    def get(self, seed: int, size: int = 50, n_edges: int = 4, kernel_size: int = 7) -> np.ndarray:
+        """
+        Returns a racetrack. It is loaded from the store, or generated and added to the store if it is missing.
+        The racetrack is identical to `Generator(random_state=seed).generate_racetrack_safely(size, n_edges, kernel_size)`.
+
+        :param seed: seed for the racetrack generator
+        :param size: specifies the size of the whole racetrack in x and y direction (square)
+        :param n_edges: number of edges the racetrack should have
+        :param kernel_size: basically specifies the size of the track
+        """
+        path = self.path(seed, size, n_edges, kernel_size)
+        if os.path.exists(path):
+            return self.__unpack(np.load(path), size)
+        track = _generate(seed, size, n_edges, kernel_size)
+        self.__save(path, track)
+        return track
+
+    def build(self, seeds: list[int], size: int = 50, n_edges: int = 4, kernel_size: int = 7,
+              n_workers: int | None = None) -> int:
+        """
+        Generates all missing racetracks of the given seeds in parallel, e.g. to pre-build a corpus of evaluation tracks.
+
+        :param seeds: seeds for the racetrack generator
+        :param size: specifies the size of the whole racetrack in x and y direction (square)
+        :param n_edges: number of edges the racetrack should have
+        :param kernel_size: basically specifies the size of the track
+        :param n_workers: number of worker processes. If `None`, all cores are used.
+        :return: number of generated racetracks
+        """
+        missing = [seed for seed in dict.fromkeys(seeds) if not self.contains(seed, size, n_edges, kernel_size)]
+        if len(missing) == 0:
+            return 0
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            tracks = executor.map(_generate, missing, [size] * len(missing), [n_edges] * len(missing),
+                                  [kernel_size] * len(missing), chunksize=max(1, len(missing) // 64))
+            for seed, track in zip(missing, tracks):
+                self.__save(self.path(seed, size, n_edges, kernel_size), track)
+        return len(missing)
+
+    @staticmethod
+    def __pack(track: np.ndarray) -> np.ndarray:
+        """
+        Packs the cells (values 0-3) of a racetrack into bytes, with 4 cells per byte
+        """
+        cells = track.astype(np.uint8).reshape(-1)
+        cells = np.concatenate([cells, np.zeros(-len(cells) % 4, dtype=np.uint8)]).reshape(-1, 4)
+        return cells[:, 0] << 6 | cells[:, 1] << 4 | cells[:, 2] << 2 | cells[:, 3]
+
+    @staticmethod
+    def __unpack(packed: np.ndarray, size: int) -> np.ndarray:
+        """
+        Unpacks the bytes created by `__pack` into a racetrack of the given size
+        """
+        cells = np.stack([packed >> 6, packed >> 4 & 3, packed >> 2 & 3, packed & 3], axis=1).reshape(-1)
+        return cells[:size * size].reshape(size, size).astype(np.float64)
+
+    def __save(self, path: str, track: np.ndarray) -> None:
+        """
+        Saves a racetrack. The file is written under a temporary name first,
+        so that an interrupted write or another process writing the same racetrack is never loaded.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+        np.save(tmp_path, self.__pack(track))
+        os.replace(tmp_path, path)
+
+
+def _generate(seed: int, size: int, n_edges: int, kernel_size: int) -> np.ndarray:
+    """
+    Generates a single racetrack (in a worker process)
+    """
+    return Generator(random_state=seed).generate_racetrack_safely(size=size, n_edges=n_edges, kernel_size=kernel_size)
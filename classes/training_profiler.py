@@ -0,0 +1,172 @@
+import csv
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+import numpy as np
+
+from .array_agent import ArrayAgent
+from .base_agent import BaseAgent
+from .crash_type import CrashType
+from .game import Game
+
+
+class TrainingProfiler:
+    PHASES = ("act", "step", "learn", "evaluate")
+
+    def __init__(self, q_size_interval: int = 100, step_limit: int = 1000):
+        """
+        Collects where the time of a training run goes, and what happens in the game.
+        The agent and game are only measured after `instrument` has been called on them,
+        thus training without a profiler has no overhead at all.
+
+        Phases:
+        * act: choosing an action (`determine_epsilon_action`)
+        * step: applying an action to the game (`noisy_step`)
+        * learn: updating the agent (`learn` or `update`)
+        * evaluate: everything inside `with profiler.phase("evaluate")`
+
+        :param q_size_interval: after how many episodes the size of the Q-table is recorded
+        :param step_limit: maximal number of steps of an episode, used to count the episodes that hit it
+        """
+        self.q_size_interval = q_size_interval
+        self.step_limit = step_limit
+
+        self.times = dict.fromkeys(self.PHASES, 0.0)  # seconds spent per phase
+        self.calls = dict.fromkeys(self.PHASES, 0)  # number of measurements per phase
+        self.n_steps = 0
+        self.crashes = {crash_type: 0 for crash_type in CrashType if crash_type != CrashType.NONE}
+        self.n_episodes = 0
+        self.n_capped_episodes = 0  # episodes that hit the step limit without reaching the finish line
+        self.q_sizes: list[tuple[int, int]] = []  # (episode, number of learned state-action-pairs)
+        self.episode_end_callbacks: list[Callable[[int, Game, BaseAgent], None]] = []
+
+    def instrument(self, agent: BaseAgent, game: Game) -> None:
+        """
+        Starts measuring the training methods of an agent and a game.
+        Only the given instances are affected, not their classes.
+
+        :param agent: the agent that is trained
+        :param game: the game the agent is trained on
+        """
+        agent.determine_epsilon_action = self.__timed("act", agent.determine_epsilon_action)
+        for name in ("learn", "update"):
+            if hasattr(agent, name):
+                setattr(agent, name, self.__timed("learn", getattr(agent, name)))
+
+        noisy_step = self.__timed("step", game.noisy_step)
+
+        @functools.wraps(noisy_step)
+        def counted_noisy_step(action):
+            reward = noisy_step(action)
+            self.n_steps += 1
+            if game.last_crash != CrashType.NONE:
+                self.crashes[game.last_crash] += 1
+            return reward
+
+        game.noisy_step = counted_noisy_step
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Measures the time of a block of code as the given phase, e.g. `with profiler.phase("evaluate"): ...`
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] += time.perf_counter() - start
+            self.calls[name] += 1
+
+    def on_episode_end(self, callback: Callable[[int, Game, BaseAgent], None]) -> None:
+        """
+        Registers a function that is called at the end of every training episode, before the game is reset.
+
+        :param callback: called with the number of the episode, the game and the agent
+        """
+        self.episode_end_callbacks.append(callback)
+
+    def end_episode(self, episode: int, game: Game, agent: BaseAgent) -> None:
+        """
+        Has to be called at the end of every training episode, before the game is reset.
+
+        :param episode: number of the episode
+        :param game: the game the agent is trained on
+        :param agent: the agent that is trained
+        """
+        self.n_episodes += 1
+        if game.get_n_steps() >= self.step_limit and not game.is_finished():
+            self.n_capped_episodes += 1
+        if episode % self.q_size_interval == 0:
+            self.q_sizes.append((episode, self.q_size(agent)))
+        for callback in self.episode_end_callbacks:
+            callback(episode, game, agent)
+
+    @staticmethod
+    def q_size(agent: BaseAgent) -> int:
+        """
+        Returns the number of state-action-pairs the agent has learned a value for
+        """
+        if isinstance(agent, ArrayAgent):
+            return int(np.count_nonzero(agent.q_counts))
+        return len(agent.q)
+
+    def summary(self) -> dict:
+        """
+        Returns all collected data
+        """
+        return {
+            "episodes": self.n_episodes,
+            "steps": self.n_steps,
+            "capped_episodes": self.n_capped_episodes,
+            "crashes": {crash_type.name.lower(): n for crash_type, n in self.crashes.items()},
+            "time": dict(self.times),
+            "calls": dict(self.calls),
+            "q_size": [{"episode": episode, "size": size} for episode, size in self.q_sizes],
+        }
+
+    def save(self, path: str) -> None:
+        """
+        Writes all collected data to a file. The format is chosen by the extension:
+        ".json" for a nested document, ".csv" for one row per metric (columns: metric, value).
+        """
+        summary = self.summary()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", newline="") as f:
+            if os.path.splitext(path)[1].lower() == ".csv":
+                writer = csv.writer(f)
+                writer.writerow(["metric", "value"])
+                writer.writerow(["episodes", summary["episodes"]])
+                writer.writerow(["steps", summary["steps"]])
+                writer.writerow(["capped_episodes", summary["capped_episodes"]])
+                for name, n in summary["crashes"].items():
+                    writer.writerow([f"crashes.{name}", n])
+                for name in self.PHASES:
+                    writer.writerow([f"time.{name}", summary["time"][name]])
+                    writer.writerow([f"calls.{name}", summary["calls"][name]])
+                for entry in summary["q_size"]:
+                    writer.writerow([f"q_size.{entry['episode']}", entry["size"]])
+            else:
+                json.dump(summary, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def __timed(self, name: str, function: Callable) -> Callable:
+        """
+        Wraps a function, so that its time is added to the given phase
+        """
+        times = self.times
+        calls = self.calls
+        perf_counter = time.perf_counter
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            result = function(*args, **kwargs)
+            times[name] += perf_counter() - start
+            calls[name] += 1
+            return result
+
+        return timed
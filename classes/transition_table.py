@@ -0,0 +1,211 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from .action import Action
+from .crash_type import CrashType
+
+
+class TransitionTable:
+    """
+    Precomputed outcome of every (position, velocity, action) of one racetrack.
+    Built once per racetrack and shared by every game that plays on it.
+
+    States are encoded as a single integer: ((row * n_cols + col) * 9 + vx + 4) * 9 + vy + 4 (see `encode_state`).
+    Every class that indexes states by this integer uses `encode_state` and `decode_state_index`, so the encodings cannot diverge.
+    Actions are encoded with their index in the action space of the agent (see `Action.index`).
+    """
+
+    # shared tables of the most recently used racetracks, the least recently used table is dropped first
+    __tables: OrderedDict[tuple[tuple[int, ...], bytes], "TransitionTable"] = OrderedDict()
+    cache_size = 4  # maximal number of shared tables
+
+    RESET = -1  # marker in `next_state` for a car that crashed and has to be reset to the start-line
+
+    def __init__(self, racetrack: np.ndarray):
+        """
+        :param racetrack: the racetrack for which the transitions should be computed
+        """
+        self.racetrack = racetrack
+        self.shape: tuple[int, int] = racetrack.shape
+        self.n_states = racetrack.shape[0] * racetrack.shape[1] * 81
+
+        self.start_cells = [tuple(coord) for coord in np.argwhere(racetrack == 2).tolist()]
+        self.end_cells = set(tuple(coord) for coord in np.argwhere(racetrack == 3).tolist())
+
+        # next_state[s, a]: the state after applying action a in state s, or RESET if the car crashed
+        # reward[s, a]: the reward for applying action a in state s
+        # finished[s, a]: if the car reached the finish-line by applying action a in state s
+        # crash_type[s, a]: why the car crashed by applying action a in state s (see `CrashType`)
+        self.next_state, self.finished, self.crash_type = self.__compute_transitions()
+        self.reward = np.where(self.next_state == self.RESET, -5, -1).astype(np.int8)
+
+    @classmethod
+    def for_racetrack(cls, racetrack: np.ndarray) -> "TransitionTable":
+        """
+        Returns the shared transition table of a racetrack. It is only computed on the first call for each racetrack,
+        as long as the table is among the `cache_size` most recently used ones.
+
+        :param racetrack: the racetrack for which the transition table should be returned
+        """
+        key = (racetrack.shape, racetrack.tobytes())
+        table = cls.__tables.get(key)
+        if table is None:
+            table = cls(racetrack)
+            cls.__tables[key] = table
+            while len(cls.__tables) > cls.cache_size:
+                cls.__tables.popitem(last=False)
+        else:
+            cls.__tables.move_to_end(key)
+        return table
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """
+        Drops all shared transition tables, e.g. after the training on a racetrack is finished
+        """
+        cls.__tables.clear()
+
+    @staticmethod
+    def encode_state(n_cols: int, row, col, vx, vy):
+        """
+        Encodes positions and velocities into state indices. Works on single ints and on numpy arrays.
+
+        :param n_cols: number of columns of the racetrack
+        :param vx: velocity in x direction, in [-4, 4]
+        :param vy: velocity in y direction, in [-4, 4]
+        """
+        return ((row * n_cols + col) * 9 + vx + 4) * 9 + vy + 4
+
+    @staticmethod
+    def decode_state_index(n_cols: int, state_index: int) -> tuple[int, int, int, int]:
+        """
+        Decodes a state index created with `encode_state` into row, column, vx and vy
+
+        :param n_cols: number of columns of the racetrack
+        """
+        cell, vy = divmod(state_index, 9)
+        cell, vx = divmod(cell, 9)
+        row, col = divmod(cell, n_cols)
+        return row, col, vx - 4, vy - 4
+
+    def state_index(self, pos: tuple[int, int], vel: tuple[int, int]) -> int:
+        """
+        Encodes a position and velocity into a state index
+        """
+        return self.encode_state(self.shape[1], pos[0], pos[1], vel[0], vel[1])
+
+    def decode_state(self, state_index: int) -> tuple[tuple[int, int], tuple[int, int]]:
+        """
+        Decodes a state index into a position and velocity
+        """
+        row, col, vx, vy = self.decode_state_index(self.shape[1], state_index)
+        return (row, col), (vx, vy)
+
+    def __compute_transitions(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Applies the rules of `Game.step` to all states and actions at once.
+
+        :return: next state, finished flag and crash type, all of shape (n_states, n_actions)
+        """
+        n_rows, n_cols = self.shape
+        rows, cols = np.indices(self.shape)
+        velocities = range(-4, 5)
+
+        # outcome of moving with a given (already updated) velocity, for every cell
+        # dimensions: cell, vx + 4, vy + 4
+        moved_state = np.full((n_rows * n_cols, 9, 9), self.RESET, dtype=np.int32)
+        moved_finished = np.zeros((n_rows * n_cols, 9, 9), dtype=bool)
+        moved_crash = np.full((n_rows * n_cols, 9, 9), CrashType.OUT_OF_BOUNDS, dtype=np.int8)
+
+        for vx in velocities:
+            for vy in velocities:
+                new_rows = rows + vx
+                new_cols = cols + vy
+                out_of_bound = (new_rows < 0) | (new_rows >= n_rows) | (new_cols < 0) | (new_cols >= n_cols)
+                clipped_rows = np.clip(new_rows, 0, n_rows - 1)
+                clipped_cols = np.clip(new_cols, 0, n_cols - 1)
+
+                # cells inside the map: the line only depends on the velocity, so it can be checked for all cells at once
+                crashed = np.zeros(self.shape, dtype=bool)
+                for dx, dy in self.__line(vx, vy):
+                    line_rows = rows + dx
+                    line_cols = cols + dy
+                    inside = (line_rows >= 0) & (line_rows < n_rows) & (line_cols >= 0) & (line_cols < n_cols)
+                    crashed |= inside & (self.racetrack[np.clip(line_rows, 0, n_rows - 1), np.clip(line_cols, 0, n_cols - 1)] == 0)
+                off_track = self.racetrack[clipped_rows, clipped_cols] == 0
+                crashed |= off_track
+                moved_crash[:, vx + 4, vy + 4] = np.where(
+                    out_of_bound, CrashType.OUT_OF_BOUNDS,
+                    np.where(off_track, CrashType.OFF_TRACK, np.where(crashed, CrashType.CORNER_CUT, CrashType.NONE))
+                ).reshape(-1)
+                valid = ~out_of_bound & ~crashed
+                cells = (rows * n_cols + cols)[valid]
+                moved_state[cells, vx + 4, vy + 4] = \
+                    self.encode_state(n_cols, new_rows[valid], new_cols[valid], vx, vy)
+                moved_finished[cells, vx + 4, vy + 4] = self.racetrack[new_rows[valid], new_cols[valid]] == 3
+
+                # cells that would leave the map: only survive, if they stop on the finish-line (with velocity reset to 0)
+                for row, col in np.argwhere(out_of_bound & (self.racetrack[clipped_rows, clipped_cols] == 3)).tolist():
+                    end_row, end_col = int(clipped_rows[row, col]), int(clipped_cols[row, col])
+                    line = self.__line(end_row - row, end_col - col)
+                    if any(self.racetrack[row + dx][col + dy] == 0 for dx, dy in line):
+                        moved_crash[row * n_cols + col, vx + 4, vy + 4] = CrashType.CORNER_CUT
+                        continue
+                    moved_crash[row * n_cols + col, vx + 4, vy + 4] = CrashType.NONE
+                    moved_state[row * n_cols + col, vx + 4, vy + 4] = self.encode_state(n_cols, end_row, end_col, 0, 0)
+                    moved_finished[row * n_cols + col, vx + 4, vy + 4] = True
+
+        # velocity after applying an action, dimensions: vx + 4, vy + 4, action
+        new_vx = np.zeros((9, 9, 9), dtype=np.int64)
+        new_vy = np.zeros((9, 9, 9), dtype=np.int64)
+        for action in [Action(x, y) for y in (-1, 0, 1) for x in (-1, 0, 1)]:
+            for vx in velocities:
+                for vy in velocities:
+                    new_vel = (vx + action.x, vy + action.y)
+                    if new_vel[0] > 4 or new_vel[0] < -4 or new_vel[1] > 4 or new_vel[1] < -4:
+                        new_vel = (vx, vy)
+                    if new_vel[0] == 0 and new_vel[1] == 0:
+                        new_vel = (1, 0)
+                    new_vx[vx + 4, vy + 4, action.index] = new_vel[0] + 4
+                    new_vy[vx + 4, vy + 4, action.index] = new_vel[1] + 4
+
+        cells = np.arange(n_rows * n_cols)[:, None, None, None]
+        next_state = moved_state[cells, new_vx[None], new_vy[None]].reshape(self.n_states, 9)
+        finished = moved_finished[cells, new_vx[None], new_vy[None]].reshape(self.n_states, 9)
+        crash_type = moved_crash[cells, new_vx[None], new_vy[None]].reshape(self.n_states, 9)
+        return next_state, finished, crash_type
+
+    @staticmethod
+    def __line(dx: int, dy: int) -> list[tuple[int, int]]:
+        """
+        Returns the offsets of all cells that `Game.__check_intersect` visits on the line from (0, 0) to (dx, dy).
+        The visited cells do not depend on the starting position, only on the distance between the positions.
+        """
+        x0, y0 = 0, 0
+        sx = 1 if 0 < dx else -1
+        sy = 1 if 0 < dy else -1
+        dist_x = abs(dx)
+        dist_y = -abs(dy)
+        error = dist_x + dist_y
+
+        cells = []
+        while True:
+            cells.append((x0, y0))
+
+            if x0 == dx and y0 == dy:
+                break
+
+            e2 = 2 * error
+            if e2 >= dist_y:
+                if x0 == dx:
+                    break
+                error += dist_y
+                x0 += sx
+            if e2 <= dist_x:
+                if y0 == dy:
+                    break
+                error += dist_x
+                y0 += sy
+
+        return cells
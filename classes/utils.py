@@ -4,6 +4,7 @@ import numpy as np
 
 from classes.generator import Generator
 from classes.racetrack_list import RacetrackList
+from classes.track_store import TrackStore
 
 
 def check_positive_int(value_str: str) -> int:
@@ -21,17 +22,63 @@ def check_positive_int(value_str: str) -> int:
     return value
 
 
-def get_track(track_number: int | None, track_random_seed: int | None) -> np.ndarray:
+def check_strictly_positive_int(value_str: str) -> int:
+    """
+    Helper function for argparse, to convert arguments into positive integers (greater than 0)
+
+    :param value_str: argument value
+    """
+    value = check_positive_int(value_str)
+    if value == 0:
+        raise argparse.ArgumentTypeError(f"{value_str} is not greater than 0")
+    return value
+
+
+def check_positive_float(value_str: str) -> float:
+    """
+    Helper function for argparse, to convert arguments into positive floats (greater than 0)
+
+    :param value_str: argument value
+    """
+    try:
+        value = float(value_str)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value_str} is not a number")
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f"{value_str} is not a positive number")
+    return value
+
+
+def check_probability(value_str: str) -> float:
+    """
+    Helper function for argparse, to convert arguments into probabilities (between 0 and 1)
+
+    :param value_str: argument value
+    """
+    try:
+        value = float(value_str)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value_str} is not a number")
+    if not 0 <= value <= 1:
+        raise argparse.ArgumentTypeError(f"{value_str} is not between 0 and 1")
+    return value
+
+
+def get_track(track_number: int | None, track_random_seed: int | None,
+              track_store: TrackStore | None = None) -> np.ndarray:
     """
     Get a racetrack from either the predefined tracklist, or the racetrack generator.
     The arguments track_number & track_random_seed are mutually exclusive.
 
     :param track_number: Number of the racetrack on the predefined tracklist
     :param track_random_seed: seed for the racetrack generator
+    :param track_store: Store to load generated racetracks from (and to add them to), instead of generating them again. If `None`, the racetrack is always generated.
     """
     if track_number is not None:
         return RacetrackList.get_track(track_number)
     if track_random_seed is not None:
+        if track_store is not None:
+            return track_store.get(track_random_seed, size=50, n_edges=4, kernel_size=7)
         g = Generator(random_state=track_random_seed)
         return g.generate_racetrack_safely(size=50, n_edges=4, kernel_size=7)
     raise ValueError("either track_number or track_random_seed must have a value")
\ No newline at end of file
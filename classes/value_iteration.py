@@ -0,0 +1,110 @@
+import numpy as np
+
+from .dense_agent import DenseAgent
+from .transition_table import TransitionTable
+
+
+class ValueIteration:
+    def __init__(self, racetrack: np.ndarray, gamma: float = 0.9, noise: float = 0.1,
+                 transition_table: TransitionTable | None = None):
+        """
+        Computes the optimal policy of a racetrack with value iteration, using the known rules of the game.
+        All states are updated at once with array operations.
+
+        :param racetrack: the racetrack for which the policy should be computed
+        :param gamma: discount factor of future rewards
+        :param noise: probability that an action is ignored, like in `Game.noisy_step`. Use 0 for `Game.step`.
+        :param transition_table: Precomputed transitions of the racetrack. If `None`, the shared table of the racetrack is used.
+        """
+        self.racetrack = racetrack
+        self.gamma = gamma
+        self.noise = noise
+        self.transition_table = transition_table if transition_table is not None else TransitionTable.for_racetrack(racetrack)
+
+        table = self.transition_table
+        self.start_states = np.array([table.state_index(cell, (0, 0)) for cell in table.start_cells], dtype=np.int64)
+        self.noop_action = 4  # index of Action(0, 0)
+
+        self.v = np.zeros(table.n_states)  # optimal value of each state
+        self.q = np.zeros((table.n_states, 9))  # optimal expected return of each state-action-pair
+
+    def solve(self, tolerance: float = 1e-6, max_iterations: int = 10000) -> int:
+        """
+        Runs value iteration until the values change less than the tolerance.
+
+        :param tolerance: maximal change of any value, at which the iteration stops
+        :param max_iterations: maximal number of iterations
+        :return: number of iterations
+        """
+        for i in range(1, max_iterations + 1):
+            self.q = self.__expected_returns(self.v)
+            v = self.q.max(axis=1)
+            delta = np.abs(v - self.v).max()
+            self.v = v
+            if delta < tolerance:
+                return i
+        return max_iterations
+
+    def policy(self) -> np.ndarray:
+        """
+        Returns the index of the best action of each state
+        """
+        return self.q.argmax(axis=1)
+
+    def to_agent(self, random_state: int | None) -> DenseAgent:
+        """
+        Returns an agent that plays the optimal policy, for use in the existing evaluation code.
+
+        :param random_state: Used for generating the randomness of the agent. Pass an int for reproducible output across multiple function calls
+        """
+        agent = DenseAgent(random_state=random_state, racetrack_shape=self.racetrack.shape, gamma=self.gamma)
+        agent.q[:] = self.q.reshape(agent.q.shape)
+        agent.refresh_best_actions()
+        return agent
+
+    def evaluate_policy(self, policy: np.ndarray, tolerance: float = 1e-6, max_iterations: int = 10000) -> np.ndarray:
+        """
+        Computes the value of each state when following a given policy.
+
+        :param policy: index of the action to take in each state, e.g. `agent.q.reshape(-1, 9).argmax(axis=1)` of a `DenseAgent`
+        :param tolerance: maximal change of any value, at which the iteration stops
+        :param max_iterations: maximal number of iterations
+        """
+        states = np.arange(self.transition_table.n_states)
+        v = np.zeros(self.transition_table.n_states)
+        for _ in range(max_iterations):
+            new_v = self.__expected_returns(v)[states, policy]
+            delta = np.abs(new_v - v).max()
+            v = new_v
+            if delta < tolerance:
+                break
+        return v
+
+    def start_value(self, v: np.ndarray | None = None) -> float:
+        """
+        Returns the expected return of a game, i.e. the mean value of the states on the start line.
+
+        :param v: value of each state. If `None`, the optimal values are used.
+        """
+        if v is None:
+            v = self.v
+        return float(v[self.start_states].mean())
+
+    def optimality_gap(self, agent: DenseAgent) -> float:
+        """
+        Returns how much less return the greedy policy of an agent achieves per game than the optimal policy.
+        """
+        policy = agent.q.reshape(-1, len(agent.action_space)).argmax(axis=1)
+        return self.start_value() - self.start_value(self.evaluate_policy(policy))
+
+    def __expected_returns(self, v: np.ndarray) -> np.ndarray:
+        """
+        Computes the expected return of each state-action-pair, given the values of the next states.
+        Crashed cars continue from a random start state, cars that finished receive no further reward.
+        """
+        table = self.transition_table
+        next_values = np.where(table.next_state == TransitionTable.RESET, v[self.start_states].mean(),
+                               v[table.next_state])
+        next_values[table.finished] = 0
+        returns = table.reward + self.gamma * next_values
+        return (1 - self.noise) * returns + self.noise * returns[:, [self.noop_action]]
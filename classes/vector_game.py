@@ -0,0 +1,135 @@
+import numpy as np
+
+from .transition_table import TransitionTable
+
+
+class VectorGame:
+    def __init__(self, racetrack: np.ndarray, n_cars: int, random_state: None | int = None,
+                 transition_table: TransitionTable | None = None, buffer_size: int = 1024):
+        """
+        Plays the game with many independent cars at once.
+        Follows the same rules as `Game`, but keeps the positions and velocities of all cars in arrays.
+        Cars that reach the finish line are automatically reset to the start line.
+
+        Actions are given as indices into the action space of the agent (see `Action.index`).
+
+        :param racetrack: the racetrack on which the games should be played
+        :param n_cars: number of cars that are played simultaneously
+        :param random_state: Used for generating the randomness of the cars. Each car gets its own random stream, so a car behaves the same regardless of `n_cars`. Pass an int for reproducible output across multiple function calls
+        :param transition_table: Precomputed transitions of the racetrack. If `None`, the shared table of the racetrack is used.
+        :param buffer_size: how many random numbers are drawn at once for each car
+        """
+        self.racetrack = racetrack
+        self.n_cars = n_cars
+        self.transition_table = transition_table if transition_table is not None else TransitionTable.for_racetrack(racetrack)
+
+        self.start_states = np.array([self.transition_table.state_index(cell, (0, 0))
+                                      for cell in self.transition_table.start_cells], dtype=np.int64)
+        self.noop_action = 4  # index of Action(0, 0)
+
+        # every car has its own random stream, from which random numbers are drawn in blocks
+        seeds = np.random.SeedSequence(random_state).spawn(n_cars)
+        self.rnds = [np.random.default_rng(seed) for seed in seeds]
+        self.random_numbers = np.empty((n_cars, buffer_size))
+        self.random_cursor = np.full(n_cars, buffer_size)
+
+        self.states = np.zeros(n_cars, dtype=np.int64)
+        self.n_steps = np.zeros(n_cars, dtype=np.int64)
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Reset all games to starting conditions
+        """
+        self.states[:] = self.__draw_start_states(np.arange(self.n_cars))
+        self.n_steps[:] = 0
+
+    def get_states(self) -> np.ndarray:
+        """
+        Get the current state of every car, encoded as state index of the transition table
+
+        :return: Array of shape (n_cars,)
+        """
+        return self.states.copy()
+
+    def get_positions(self) -> np.ndarray:
+        """
+        Get the current position of every car
+
+        :return: Array of shape (n_cars, 2)
+        """
+        cells = self.states // 81
+        return np.stack([cells // self.racetrack.shape[1], cells % self.racetrack.shape[1]], axis=1)
+
+    def get_velocities(self) -> np.ndarray:
+        """
+        Get the current velocity of every car
+
+        :return: Array of shape (n_cars, 2)
+        """
+        return np.stack([self.states // 9 % 9 - 4, self.states % 9 - 4], axis=1)
+
+    def get_n_steps(self) -> np.ndarray:
+        """
+        Get number of steps that were done in the current game of every car
+        """
+        return self.n_steps.copy()
+
+    def noisy_step(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Applies the specified actions to all cars.
+        For each car, with a certain probability the action is ignored (= noise).
+
+        :param actions: action index for each car
+        :return: returns the reward for each car, and which cars reached the finish line (and have been reset)
+        """
+        cars = np.arange(self.n_cars)
+        actions = np.where(self.__draw_random_numbers(cars) >= 0.9, self.noop_action, actions)
+        return self.step(actions)
+
+    def step(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Applies the specified actions to all cars.
+
+        :param actions: action index for each car
+        :return: returns the reward for each car, and which cars reached the finish line (and have been reset)
+        """
+        table = self.transition_table
+        self.n_steps += 1
+
+        rewards = table.reward[self.states, actions].astype(np.int64)
+        finished = table.finished[self.states, actions]
+        next_states = table.next_state[self.states, actions].astype(np.int64)
+
+        # crashed cars are reset to the start line
+        crashed = np.flatnonzero(next_states == TransitionTable.RESET)
+        if len(crashed) > 0:
+            next_states[crashed] = self.__draw_start_states(crashed)
+        self.states = next_states
+
+        # cars that reached the finish line start a new game
+        done = np.flatnonzero(finished)
+        if len(done) > 0:
+            self.states[done] = self.__draw_start_states(done)
+            self.n_steps[done] = 0
+
+        return rewards, finished
+
+    def __draw_start_states(self, cars: np.ndarray) -> np.ndarray:
+        """
+        Draws a random start state (position on the start line, no velocity) for each specified car
+        """
+        indices = (self.__draw_random_numbers(cars) * len(self.start_states)).astype(np.int64)
+        return self.start_states[indices]
+
+    def __draw_random_numbers(self, cars: np.ndarray) -> np.ndarray:
+        """
+        Draws the next random number in [0, 1) from the stream of each specified car
+        """
+        exhausted = cars[self.random_cursor[cars] >= self.random_numbers.shape[1]]
+        for car in exhausted:
+            self.random_numbers[car] = self.rnds[car].random(self.random_numbers.shape[1])
+            self.random_cursor[car] = 0
+        numbers = self.random_numbers[cars, self.random_cursor[cars]]
+        self.random_cursor[cars] += 1
+        return numbers
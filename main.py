@@ -1,17 +1,30 @@
 import argparse
-import copy
+import contextlib
+import functools
+import os
 import time
 
 import numpy as np
 
 from classes.action import Action
-from classes.agent import Agent
+from classes.background_evaluator import BackgroundEvaluator
+from classes.base_agent import BaseAgent
+from classes.checkpoint import load_checkpoint, save_checkpoint
+from classes.convergence_monitor import ConvergenceMonitor
+from classes.dense_agent import DenseAgent
+from classes.distributed_trainer import DistributedTrainer
+from classes.episode_buffer import EpisodeBuffer
+from classes.episode_renderer import EpisodeRenderer
 from classes.episode_visualizer import EpisodeVisualizer
 from classes.game import Game
 from classes.interactive_visualizer import InteractiveVisualizer
+from classes.memmap_policy import MemmapPolicy
+from classes.q_learning_agent import QLearningAgent
 from classes.racetrack_list import RacetrackList
-from classes.state import State
-from classes.utils import check_positive_int, get_track
+from classes.track_store import TrackStore
+from classes.training_profiler import TrainingProfiler
+from classes.transition_table import TransitionTable
+from classes.utils import check_positive_float, check_positive_int, check_probability, check_strictly_positive_int, get_track
 
 
 def play_user(track: np.ndarray) -> None:
@@ -36,33 +49,113 @@ def play_user(track: np.ndarray) -> None:
     print("* You reached the finish line!")
 
 
-def play_single_game(game: Game, agent: Agent) -> list[tuple[State, Action, int]]:
-    episode: list[tuple[State, Action, int]] = []
+def play_single_game(game: Game, agent: BaseAgent | MemmapPolicy) -> EpisodeBuffer:
+    episode = EpisodeBuffer()
     while not game.is_finished() and game.get_n_steps() < 1000:
         state = game.get_state()
         action = agent.determine_best_action(state)
         reward = game.step(action)
-        episode.append((state, action, reward))
+        episode.append(state, action, reward)
     return episode
 
 
+def play_test_game(policy: MemmapPolicy, track: np.ndarray) -> tuple[EpisodeBuffer, int]:
+    """
+    Play the test game of a preliminary result, on the process of the `BackgroundEvaluator`
+
+    :param policy: The policy of the agent during training
+    :param track: The racetrack for the game
+    :return: The test game, including its last state, and its number of steps
+    """
+    test_game = Game(racetrack=track, random_state=43, transition_table=TransitionTable.for_racetrack(track))
+    test_episode = play_single_game(test_game, policy)
+    test_episode.append(test_game.get_state(), Action(0, 0), 0)  # Append last state for drawing
+    return test_episode, test_game.get_n_steps()
+
+
+def show_preliminary_result(track: np.ndarray, n_episode: int, test_episode: EpisodeBuffer, n_steps: int,
+                            visualizer: EpisodeVisualizer, renderer: EpisodeRenderer, render_dir: str | None) -> None:
+    """
+    Show the test game of an agent during training
+
+    :param track: The racetrack for the game
+    :param n_episode: After how many episodes the test game was played
+    :param test_episode: The test game, including its last state
+    :param n_steps: Number of steps of the test game
+    :param visualizer: Visualizer to show the game in a window
+    :param renderer: Renderer to save the game as an image
+    :param render_dir: Directory to save the image to. If `None`, the game is shown in a window.
+    """
+    if render_dir is not None:
+        renderer.save_episode(os.path.join(render_dir, f"training-{n_episode}.png"), track, test_episode)
+    else:
+        visualizer.visualize_episode(track, test_episode, f"racetrack | training: n_episode={n_episode}, n_steps={n_steps}")
+    print(f"* {n_episode} {n_steps}")
+
+
 def play_ai(track: np.ndarray, episodes_to_train: int, preliminary_results: int | None, testruns: int,
-            playstyle_interactive: bool) -> None:
+            playstyle_interactive: bool, checkpoint_in: str | None = None, checkpoint_out: str | None = None,
+            evaluate_only: bool = False, agent_type: str = "monte_carlo", profile_out: str | None = None,
+            render_dir: str | None = None, speed: float = 1.0, early_stopping: bool = False,
+            convergence_window: int = 500, convergence_patience: int = 3, convergence_q_change: float | None = None,
+            n_workers: int | None = None, epsilon: float = 0.1, alpha: float = 0.5) -> None:
     """
     Train an AI on a racetrack, and then watch it play.
 
     :param track: The racetrack for the game
-    :param episodes_to_train: How many episodes to train the agent
+    :param episodes_to_train: How many episodes to train the agent. When resuming from a checkpoint, this includes the episodes already trained.
     :param playstyle_interactive: If the game that AI plays should be shown life (aka interactively), or if the whole game should be shown in one static image (not interactively)
     :param preliminary_results: After how many episodes to show preliminary results (aka do a test run). If `None`, then no preliminary results will be shown.
+    :param checkpoint_in: Checkpoint to resume the agent from. If `None`, a new agent is trained.
+    :param checkpoint_out: File to save the agent to after training. If `None`, the agent is not saved.
+    :param evaluate_only: If the agent should not be trained, but only be evaluated.
+    :param agent_type: If the agent learns after each episode (monte_carlo), or after each step (q_learning)
+    :param profile_out: File (.json or .csv) to save the time per phase and the counters of the training to. If `None`, the training is not profiled.
+    :param render_dir: Directory to save the images of the games to as PNG files, instead of showing them in windows. If `None`, windows are shown.
+    :param speed: Speed-up factor of the interactive playstyle, 1 shows 2 steps per second.
+    :param early_stopping: If the training should stop before `episodes_to_train`, as soon as the mean reward does not improve anymore (see `ConvergenceMonitor`).
+    :param convergence_window: Number of episodes over which the statistics for early stopping are computed.
+    :param convergence_patience: How many windows in a row without improvement stop the training.
+    :param convergence_q_change: Maximal mean absolute change of the expected returns of a window, for the training to stop. If `None`, only the reward is checked.
+    :param n_workers: Number of actor processes that play the training episodes (see `DistributedTrainer`), only for monte_carlo. If `None`, the agent is trained on a single process.
+    :param epsilon: Probability of a random action during training.
+    :param alpha: Learning rate of the q_learning agent (see `QLearningAgent`).
     """
 
     if playstyle_interactive:
         preliminary_results = None
 
-    agent = Agent(random_state=42)
-    game = Game(racetrack=track, random_state=42)
+    if agent_type == "q_learning":
+        agent = QLearningAgent(random_state=42, racetrack_shape=track.shape, alpha=alpha)
+    else:
+        agent = DenseAgent(random_state=42, racetrack_shape=track.shape)
+    transition_table = TransitionTable.for_racetrack(track)
+    game = Game(racetrack=track, random_state=42, transition_table=transition_table)
     visualizer = EpisodeVisualizer()
+    renderer = EpisodeRenderer()
+    episode = EpisodeBuffer()
+    profiler = None
+    if profile_out is not None:
+        profiler = TrainingProfiler()
+        profiler.instrument(agent, game)
+
+    episodes_trained = 0
+    if checkpoint_in is not None:
+        start = time.time()
+        episodes_trained = load_checkpoint(checkpoint_in, agent, game)
+        end = time.time()
+        print(f"Loaded checkpoint '{checkpoint_in}' trained for {episodes_trained} episodes in {end - start : 2.4f}s")
+    if evaluate_only:
+        episodes_to_train = episodes_trained
+    monitor = None
+    if early_stopping:
+        monitor = ConvergenceMonitor(window=convergence_window, patience=convergence_patience,
+                                     q_change_tolerance=convergence_q_change)
+
+    # preliminary results are played on a worker process with the exported policy of the agent, while the training continues
+    evaluator = None
+    if preliminary_results is not None:
+        evaluator = BackgroundEvaluator(functools.partial(play_test_game, track=track))
 
     # Train Model
     print("Training agent...")
@@ -70,36 +163,100 @@ def play_ai(track: np.ndarray, episodes_to_train: int, preliminary_results: int
         print("* <n_episode> <n_steps> ")
     else:
         print("* <n_episode> ")
-    start = time.time()
-    for i in range(1, episodes_to_train + 1):
-        # play one episode & train the agent on this episode
-        episode: list[tuple[State, Action, int]] = []
-        while not game.is_finished() and game.get_n_steps() < 1000:
-            state = game.get_state()
-            action = agent.determine_epsilon_action(state, 0.1)
-            reward = game.noisy_step(action)
-            episode.append((state, action, reward))
-        agent.learn(episode)
-        game.reset()
+
+    def end_episode(i: int, episode_reward: int, n_steps: int, q_change: float) -> bool:
+        """
+        Collects the statistics of a finished training episode, and shows the preliminary results
+
+        :return: True if the training has converged
+        """
+        converged = monitor is not None and monitor.update(episode_reward, n_steps, q_change)
         # show preliminary results, if specified
-        if preliminary_results is not None:
+        if evaluator is not None:
             if i % preliminary_results == 0 or i == 1:
-                test_game = Game(racetrack=track, random_state=43)
-                test_episode = play_single_game(test_game, copy.deepcopy(agent))
-                test_episode.append((test_game.get_state(), Action(0, 0), 0))  # Append last state for drawing
-                visualizer.visualize_episode(track, test_episode,
-                                             f"racetrack | training: n_episode={i}, n_steps={test_game.get_n_steps()}")
-                print(f"* {i} {test_game.get_n_steps()}")
+                # only the export of the policy is measured, the test game does not hold up the training
+                with profiler.phase("evaluate") if profiler is not None else contextlib.nullcontext():
+                    evaluator.submit(i, agent)
+            for n_episode, (test_episode, test_n_steps) in evaluator.poll():
+                show_preliminary_result(track, n_episode, test_episode, test_n_steps, visualizer, renderer, render_dir)
+        elif monitor is not None:
+            if i % convergence_window == episodes_trained % convergence_window:
+                stats = monitor.statistics()
+                print(f"* {i} [mean reward: {stats['mean_reward']:.1f}, median steps: {stats['median_steps']:.0f}, "
+                      f"mean q change: {stats['mean_q_change']:.4f}]")
         elif i % 500 == 0:
             print(f"* {i}")
+        if converged:
+            print(f"* converged after episode {episodes_trained + monitor.converged_episode}, "
+                  f"stopped after episode {i} (no improvement in {convergence_patience} windows of {convergence_window} episodes)")
+        return converged
+
+    start = time.time()
+    n_trained = episodes_trained
+    if n_workers is not None:
+        # episodes are played on the actor processes in rounds, and their statistics are merged into the agent
+        trainer = DistributedTrainer(agent, track, n_workers, epsilon=epsilon, random_state=42)
+        try:
+            converged = False
+            while n_trained < episodes_to_train and not converged:
+                round_size = min(trainer.n_workers * trainer.episodes_per_worker, episodes_to_train - n_trained)
+                round_n_steps, round_rewards, q_change = trainer.train_round(round_size)
+                for i, (n_steps, episode_reward) in enumerate(zip(round_n_steps.tolist(), round_rewards.tolist()),
+                                                              start=n_trained + 1):
+                    converged = end_episode(i, episode_reward, n_steps, q_change)
+                    if converged:
+                        break
+                n_trained += round_size  # the whole round has been merged, even if the training converged before its end
+        finally:
+            trainer.close()
+    else:
+        for i in range(episodes_trained + 1, episodes_to_train + 1):
+            if isinstance(agent, QLearningAgent):
+                # play one episode & train the agent after every step
+                episode_reward = 0
+                q_change = 0.0
+                while not game.is_finished() and game.get_n_steps() < 1000:
+                    state = game.get_state()
+                    action = agent.determine_epsilon_action(state, epsilon)
+                    reward = game.noisy_step(action)
+                    q_change += agent.update(state, action, reward, game.get_state(), game.is_finished())
+                    episode_reward += reward
+                agent.end_episode()
+                q_change /= max(1, game.get_n_steps())
+            else:
+                # play one episode & train the agent on this episode
+                episode.clear()
+                while not game.is_finished() and game.get_n_steps() < 1000:
+                    state = game.get_state()
+                    action = agent.determine_epsilon_action(state, epsilon)
+                    reward = game.noisy_step(action)
+                    episode.append(state, action, reward)
+                q_change = agent.learn(episode)
+                episode_reward = episode.total_reward()
+            if profiler is not None:
+                profiler.end_episode(i, game, agent)
+            n_trained = i
+            n_steps = game.get_n_steps()
+            game.reset()
+            if end_episode(i, episode_reward, n_steps, q_change):
+                break
     end = time.time()
+    if evaluator is not None:
+        for n_episode, (test_episode, n_steps) in evaluator.close():
+            show_preliminary_result(track, n_episode, test_episode, n_steps, visualizer, renderer, render_dir)
     print(f"* train time: {end - start : 2.4f}s")
+    if checkpoint_out is not None:
+        save_checkpoint(checkpoint_out, agent, game, n_trained)
+        print(f"* saved checkpoint '{checkpoint_out}'")
+    if profiler is not None:
+        profiler.save(profile_out)
+        print(f"* saved profile '{profile_out}'")
 
     # Evaluate Model
-    game = Game(racetrack=track, random_state=43)
+    game = Game(racetrack=track, random_state=43, transition_table=transition_table)
     print("Evaluating trained agent...")
     if playstyle_interactive:
-        visualizer = InteractiveVisualizer(game.get_state_with_racetrack(), "racetrack")
+        visualizer = InteractiveVisualizer(game.get_state_with_racetrack(), "racetrack", steps_per_second=2 * speed)
         while not game.is_finished() and game.get_n_steps() < 1000:
             state = game.get_state()
             action = agent.determine_best_action(state)
@@ -107,20 +264,22 @@ def play_ai(track: np.ndarray, episodes_to_train: int, preliminary_results: int
             visualizer.update_agent(game.get_state().agent_position)
             print(
                 f"* ai plays step {game.get_n_steps()} [action: {action}, pos: {game.get_state().agent_position}, vel: {game.get_state().agent_velocity}]")
-            time.sleep(0.5)
         print("* ai reached the finish line!")
     else:
         print(f"* plotting {testruns} games")
         visualizer = EpisodeVisualizer()
         for i in range(0, testruns):
-            episode: list[tuple[State, Action, int]] = []
+            episode.clear()
             while not game.is_finished() and game.get_n_steps() < 1000:
                 state = game.get_state()
                 action = agent.determine_best_action(state)
                 reward = game.step(action)
-                episode.append((state, action, reward))
-            episode.append((game.get_state(), Action(0, 0), 0))  # Append last state to episode for drawing
-            visualizer.visualize_episode(track, episode, f"racetrack | testrun {i + 1}, n_steps={game.get_n_steps()}")
+                episode.append(state, action, reward)
+            episode.append(game.get_state(), Action(0, 0), 0)  # Append last state to episode for drawing
+            if render_dir is not None:
+                renderer.save_episode(os.path.join(render_dir, f"testrun-{i + 1}.png"), track, episode)
+            else:
+                visualizer.visualize_episode(track, episode, f"racetrack | testrun {i + 1}, n_steps={game.get_n_steps()}")
             game.reset()
 
 
@@ -131,29 +290,91 @@ def main() -> None:
     parser.add_argument('-p', '--playstyle',
                         help="if the AI should play the game live (ai_interactive), or the game of the AI should be shown as static image (ai_static), or the user can play (user)",
                         choices=["user", "ai_interactive", "ai_static"], default="ai_static")
+    parser.add_argument('-a', '--agent',
+                        help="if the AI learns after each game with monte carlo (monte_carlo), or after each step with temporal difference learning (q_learning)",
+                        choices=["monte_carlo", "q_learning"], default="monte_carlo")
     parser.add_argument('-e', '--episodes-to-train', help="how many episodes to train the model",
                         type=check_positive_int, default=3000)
+    parser.add_argument('-ep', '--epsilon', help="probability of a random action during training",
+                        type=check_probability, default=0.1)
+    parser.add_argument('-al', '--alpha', help="learning rate of the AI that learns after each step (only for q_learning)",
+                        type=check_probability, default=0.5)
     group = parser.add_mutually_exclusive_group()
     group.add_argument('-tr', '--track-random', help="generate a random racetrack with specified seed",
                        type=check_positive_int, metavar='SEED')
     group.add_argument('-tn', '--track-number',
                        help="select a predefined racetrack, where the number represents the number of the map",
                        type=int, choices=range(0, RacetrackList.get_tracks_count()))
+    parser.add_argument('-ts', '--track-store',
+                        help="directory to load generated racetracks from, instead of generating them again (only for track-random)",
+                        metavar='DIR')
+    parser.add_argument('-w', '--workers',
+                        help="play the training episodes on this many processes, and merge their statistics into the agent (only for monte_carlo)",
+                        type=check_positive_int, metavar='N')
+    parser.add_argument('-es', '--early-stopping',
+                        help="stop the training before --episodes-to-train, as soon as the mean reward does not improve anymore",
+                        action='store_true')
+    parser.add_argument('-cw', '--convergence-window',
+                        help="number of episodes over which the mean reward for --early-stopping is computed",
+                        type=check_strictly_positive_int, default=500)
+    parser.add_argument('-cp', '--convergence-patience',
+                        help="how many windows in a row without improvement stop the training (for --early-stopping)",
+                        type=check_strictly_positive_int, default=3)
+    parser.add_argument('-cq', '--convergence-q-change',
+                        help="only stop the training, when the mean change of the expected returns of the window is below this value (for --early-stopping)",
+                        type=check_positive_float, metavar='TOLERANCE')
     parser.add_argument('-pr', '--preliminary-results',
                         help="after how many episodes to show a preliminary result during training (only for ai_static)",
                         type=check_positive_int)
     parser.add_argument('-fr', '--final-results',
                         help="how many final games to show after training (only for ai_static)",
                         type=check_positive_int)
+    parser.add_argument('-rd', '--render-dir',
+                        help="save the games as PNG images to this directory, instead of showing them in windows (only for ai_static)",
+                        metavar='DIR')
+    parser.add_argument('-s', '--speed',
+                        help="speed-up factor of the game shown live, 1 shows 2 steps per second (only for ai_interactive)",
+                        type=check_positive_float, default=1.0)
+    parser.add_argument('-lc', '--load-checkpoint',
+                        help="resume the agent from a checkpoint file, instead of training a new one (not for user)",
+                        metavar='PATH')
+    parser.add_argument('-sc', '--save-checkpoint', help="save the agent to a checkpoint file after training (not for user)",
+                        metavar='PATH')
+    parser.add_argument('-eo', '--evaluate-only', help="skip training and only evaluate the agent of --load-checkpoint",
+                        action='store_true')
+    parser.add_argument('-pf', '--profile',
+                        help="save the time per phase (act, step, learn, evaluate) and counters of the training to a .json or .csv file (not for user)",
+                        metavar='PATH')
 
     # parse arguments
     args = parser.parse_args()
     playstyle = args.playstyle
+    agent_type = args.agent
     episodes_to_train = args.episodes_to_train
     preliminary_results = args.preliminary_results
     final_results = args.final_results
     track_random_seed = args.track_random
     track_number = args.track_number
+    track_store_dir = args.track_store
+    checkpoint_in = args.load_checkpoint
+    checkpoint_out = args.save_checkpoint
+    evaluate_only = args.evaluate_only
+    profile_out = args.profile
+    render_dir = args.render_dir
+    speed = args.speed
+    early_stopping = args.early_stopping
+    convergence_window = args.convergence_window
+    convergence_patience = args.convergence_patience
+    convergence_q_change = args.convergence_q_change
+    n_workers = args.workers
+    epsilon = args.epsilon
+    alpha = args.alpha
+    if evaluate_only and checkpoint_in is None:
+        parser.error("argument -eo/--evaluate-only: requires -lc/--load-checkpoint")
+    if profile_out is not None and not profile_out.lower().endswith((".json", ".csv")):
+        parser.error("argument -pf/--profile: file must end with .json or .csv")
+    if n_workers is not None and (n_workers == 0 or agent_type != "monte_carlo" or profile_out is not None):
+        parser.error("argument -w/--workers: requires at least 1 worker and the monte_carlo agent, and cannot be profiled")
     if track_number is None and track_random_seed is None:
         track_number = 0  # set default
     if final_results is None and playstyle == "ai_static":
@@ -162,11 +383,31 @@ def main() -> None:
     # print start configuration
     print("Starting new game with:")
     print(f"* playstyle = {playstyle}")
+    if playstyle != "user":
+        print(f"* agent = {agent_type}")
     if track_number is not None:
         print(f"* track = track {track_number}")
     else:
         print(f"* track = random with seed {track_random_seed}")
-    print(f"* episodes to train = {episodes_to_train}")
+        if track_store_dir is not None:
+            print(f"* track store = {track_store_dir}")
+    print(f"* episodes to train = {'none (evaluate only)' if evaluate_only else episodes_to_train}")
+    if playstyle != "user" and not evaluate_only:
+        print(f"* epsilon = {epsilon}")
+        if agent_type == "q_learning":
+            print(f"* alpha = {alpha}")
+    if n_workers is not None and playstyle != "user":
+        print(f"* workers = {n_workers}")
+    if early_stopping:
+        print(f"* early stopping = after {convergence_patience} windows of {convergence_window} episodes without improvement")
+        if convergence_q_change is not None:
+            print(f"* early stopping q change = below {convergence_q_change}")
+    if checkpoint_in is not None:
+        print(f"* load checkpoint = {checkpoint_in}")
+    if checkpoint_out is not None:
+        print(f"* save checkpoint = {checkpoint_out}")
+    if profile_out is not None:
+        print(f"* save profile = {profile_out}")
     if playstyle == "ai_static":
         if preliminary_results is None:
             print(f"* preliminary results during training = none")
@@ -178,16 +419,32 @@ def main() -> None:
         print(f"* final results after training = {final_results} games")
     elif final_results is not None:
         print(f"* note: parameter 'final_results' is ignored since playstyle is not 'ai_static'")
+    if playstyle == "ai_interactive":
+        print(f"* speed = {speed}x ({2 * speed} steps per second)")
+    if playstyle == "ai_static" and render_dir is not None:
+        print(f"* render games to = {render_dir}")
+    elif render_dir is not None:
+        print(f"* note: parameter 'render_dir' is ignored since playstyle is not 'ai_static'")
 
     # get track & play
-    track = get_track(track_number, track_random_seed)
+    track_store = TrackStore(track_store_dir) if track_store_dir is not None and track_random_seed is not None else None
+    track = get_track(track_number, track_random_seed, track_store)
     match playstyle:
         case "user":
             play_user(track)
         case "ai_interactive":
-            play_ai(track, episodes_to_train, preliminary_results, final_results, playstyle_interactive=True)
+            play_ai(track, episodes_to_train, preliminary_results, final_results, playstyle_interactive=True,
+                    checkpoint_in=checkpoint_in, checkpoint_out=checkpoint_out, evaluate_only=evaluate_only,
+                    agent_type=agent_type, profile_out=profile_out, speed=speed, early_stopping=early_stopping,
+                    convergence_window=convergence_window, convergence_patience=convergence_patience,
+                    convergence_q_change=convergence_q_change, n_workers=n_workers, epsilon=epsilon, alpha=alpha)
         case "ai_static":
-            play_ai(track, episodes_to_train, preliminary_results, final_results, playstyle_interactive=False)
+            play_ai(track, episodes_to_train, preliminary_results, final_results, playstyle_interactive=False,
+                    checkpoint_in=checkpoint_in, checkpoint_out=checkpoint_out, evaluate_only=evaluate_only,
+                    agent_type=agent_type, profile_out=profile_out, render_dir=render_dir,
+                    early_stopping=early_stopping, convergence_window=convergence_window,
+                    convergence_patience=convergence_patience, convergence_q_change=convergence_q_change,
+                    n_workers=n_workers, epsilon=epsilon, alpha=alpha)
 
 
 if __name__ == "__main__":
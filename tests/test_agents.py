@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from classes.agent import Agent
+from classes.base_agent import BaseAgent
+from classes.checkpoint import load_checkpoint, save_checkpoint
+from classes.dense_agent import DenseAgent
+from classes.episode_buffer import EpisodeBuffer
+from classes.game import Game
+from classes.memmap_policy import MemmapPolicy
+from classes.q_learning_agent import QLearningAgent
+from classes.racetrack_list import RacetrackList
+from classes.tiled_agent import TiledAgent
+from classes.transition_table import TransitionTable
+
+TRACK = RacetrackList.get_track(1)
+AGENT_FACTORIES = {
+    "Agent": lambda: Agent(random_state=3),
+    "DenseAgent": lambda: DenseAgent(random_state=3, racetrack_shape=TRACK.shape),
+    "TiledAgent": lambda: TiledAgent(random_state=3, racetrack_shape=TRACK.shape, tile_size=5),
+}
+
+
+def train(agent: BaseAgent, n_episodes: int, as_list: bool = False) -> tuple[Game, list[tuple[int, int]]]:
+    """
+    Trains an agent like `main.py`
+
+    :param as_list: if the episodes are passed to `learn` as lists instead of buffers
+    :return: the game, and the number of steps & reward of each episode
+    """
+    game = Game(racetrack=TRACK, random_state=4, transition_table=TransitionTable.for_racetrack(TRACK))
+    episode = EpisodeBuffer()
+    statistics = []
+    for _ in range(n_episodes):
+        episode.clear()
+        while not game.is_finished() and game.get_n_steps() < 1000:
+            state = game.get_state()
+            action = agent.determine_epsilon_action(state, 0.1)
+            reward = game.noisy_step(action)
+            episode.append(state, action, reward)
+        agent.learn(list(episode) if as_list else episode)
+        statistics.append((game.get_n_steps(), episode.total_reward()))
+        game.reset()
+    return game, statistics
+
+
+def train_q_learning(agent: QLearningAgent, n_episodes: int) -> Game:
+    """
+    Trains a `QLearningAgent` after every step like `main.py`
+
+    :return: the game
+    """
+    game = Game(racetrack=TRACK, random_state=4, transition_table=TransitionTable.for_racetrack(TRACK))
+    for _ in range(n_episodes):
+        while not game.is_finished() and game.get_n_steps() < 1000:
+            state = game.get_state()
+            action = agent.determine_epsilon_action(state, 0.1)
+            reward = game.noisy_step(action)
+            agent.update(state, action, reward, game.get_state(), game.is_finished())
+        agent.end_episode()
+        game.reset()
+    return game
+
+
+def exported_policy(agent: BaseAgent, path: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the expected returns and best action masks of an agent, as written by `MemmapPolicy.export`
+    """
+    MemmapPolicy.export(agent, path, TRACK.shape)
+    return np.load(path), np.load(MemmapPolicy.masks_path(path))
+
+
+def test_agents_learn_identically(tmp_path):
+    """
+    All ways to store the expected returns have to give exactly the same training
+    """
+    results = {}
+    for name, factory in AGENT_FACTORIES.items():
+        agent = factory()
+        _, statistics = train(agent, 150)
+        results[name] = statistics, *exported_policy(agent, str(tmp_path / f"{name}.npy"))
+    list_agent = Agent(random_state=3)
+    _, statistics = train(list_agent, 150, as_list=True)
+    results["Agent (list)"] = statistics, *exported_policy(list_agent, str(tmp_path / "list.npy"))
+
+    expected_statistics, expected_q, expected_masks = results["DenseAgent"]
+    for name, (statistics, q, masks) in results.items():
+        assert statistics == expected_statistics, name
+        assert np.array_equal(q, expected_q), name
+        assert np.array_equal(masks, expected_masks), name
+
+
+@pytest.mark.parametrize("saved_name", AGENT_FACTORIES)
+@pytest.mark.parametrize("loaded_name", AGENT_FACTORIES)
+def test_checkpoint_round_trip(tmp_path, saved_name: str, loaded_name: str):
+    saved = AGENT_FACTORIES[saved_name]()
+    game, _ = train(saved, 50)
+    path = str(tmp_path / "agent.npz")
+    save_checkpoint(path, saved, game, 50)
+
+    loaded = AGENT_FACTORIES[loaded_name]()
+    loaded_game = Game(racetrack=TRACK, random_state=0)
+    assert load_checkpoint(path, loaded, loaded_game) == 50
+    assert loaded_game.get_state() == game.get_state()
+    assert loaded.rnd.getstate() == saved.rnd.getstate()
+    saved_q, saved_masks = exported_policy(saved, str(tmp_path / "saved.npy"))
+    loaded_q, loaded_masks = exported_policy(loaded, str(tmp_path / "loaded.npy"))
+    assert np.array_equal(saved_q, loaded_q)
+    assert np.array_equal(saved_masks, loaded_masks)
+
+
+def test_q_learning_best_actions_match_expected_returns():
+    """
+    The best actions updated after every step have to match the ones recomputed from the expected returns
+    """
+    agent = QLearningAgent(random_state=3, racetrack_shape=TRACK.shape)
+    train_q_learning(agent, 30)
+    masks = agent.best_action_masks.copy()
+    best_values = agent.best_values.copy()
+    agent.refresh_best_actions()
+    assert np.array_equal(masks, agent.best_action_masks)
+    assert np.array_equal(best_values, agent.best_values)
+
+
+def test_q_learning_checkpoint_round_trip(tmp_path):
+    saved = QLearningAgent(random_state=3, racetrack_shape=TRACK.shape)
+    game = train_q_learning(saved, 30)
+    path = str(tmp_path / "agent.npz")
+    save_checkpoint(path, saved, game, 30)
+    with np.load(path) as data:
+        assert len(data["q"]) < saved.q.size  # the pessimistic initial expected returns are not stored
+
+    loaded = QLearningAgent(random_state=0, racetrack_shape=TRACK.shape, initial_q=0.0)
+    assert load_checkpoint(path, loaded, Game(racetrack=TRACK, random_state=0)) == 30
+    assert loaded.initial_q == saved.initial_q
+    saved_q, saved_masks = exported_policy(saved, str(tmp_path / "saved.npy"))
+    loaded_q, loaded_masks = exported_policy(loaded, str(tmp_path / "loaded.npy"))
+    assert np.array_equal(saved_q, loaded_q)
+    assert np.array_equal(saved_masks, loaded_masks)
@@ -0,0 +1,47 @@
+from random import Random
+
+import numpy as np
+import pytest
+
+from classes.action import Action
+from classes.game import Game
+from classes.racetrack_list import RacetrackList
+from classes.transition_table import TransitionTable
+
+ACTIONS = [Action(x, y) for y in (-1, 0, 1) for x in (-1, 0, 1)]
+
+
+@pytest.mark.parametrize("track_number", range(RacetrackList.get_tracks_count()))
+@pytest.mark.parametrize("noisy", [False, True])
+def test_table_step_matches_simulated_step(track_number: int, noisy: bool):
+    """
+    The table lookup of `Game.step` has to give exactly the same games as simulating the rules of each step
+    """
+    track = RacetrackList.get_track(track_number)
+    simulated = Game(racetrack=track, random_state=1)
+    looked_up = Game(racetrack=track, random_state=1, transition_table=TransitionTable.for_racetrack(track))
+    rnd = Random(2)
+    for _ in range(20000):
+        action = rnd.choice(ACTIONS)
+        if noisy:
+            rewards = simulated.noisy_step(action), looked_up.noisy_step(action)
+        else:
+            rewards = simulated.step(action), looked_up.step(action)
+        assert rewards[0] == rewards[1]
+        assert simulated.get_state() == looked_up.get_state()
+        assert simulated.last_crash == looked_up.last_crash
+        assert simulated.is_finished() == looked_up.is_finished()
+        if simulated.is_finished() or simulated.get_n_steps() >= 1000:
+            simulated.reset()
+            looked_up.reset()
+
+
+@pytest.mark.parametrize("track_number", range(RacetrackList.get_tracks_count()))
+def test_state_index_round_trip(track_number: int):
+    table = TransitionTable.for_racetrack(RacetrackList.get_track(track_number))
+    state_indices = np.arange(table.n_states)
+    row, col, vx, vy = TransitionTable.decode_state_index(table.shape[1], state_indices)
+    assert np.array_equal(TransitionTable.encode_state(table.shape[1], row, col, vx, vy), state_indices)
+    assert vx.min() == vy.min() == -4 and vx.max() == vy.max() == 4
+    for state_index in range(0, table.n_states, 97):
+        assert table.state_index(*table.decode_state(state_index)) == state_index